@@ -1,7 +1,8 @@
 import streamlit as st
-import pandas as pd
-# Corrected import: Changed load_inventory to get_all_inventory_items
-from db_operations import load_users, get_all_inventory_items, delete_user, find_user_by_id, update_user # Removed save_users
+from db_operations import (
+    get_users_frame, estimated_count_inventory_items, count_admins, exists_username_ci,
+    delete_user, find_user_by_id, update_user
+)
 from werkzeug.security import generate_password_hash # For password hashing in edit user
 
 def admin_dashboard_page():
@@ -10,8 +11,6 @@ def admin_dashboard_page():
         return
 
     st.subheader("Admin Dashboard")
-    users = load_users()
-    inventory = get_all_inventory_items() # Use get_all_inventory_items
 
     st.write(f"Welcome to the admin panel, **{st.session_state.username}**!")
 
@@ -24,7 +23,8 @@ def admin_dashboard_page():
 
     st.markdown("---")
     st.markdown("#### Inventory Overview")
-    st.write(f"Total Inventory Items: **{len(inventory)}**")
+    # Collection metadata count; no documents are loaded
+    st.write(f"Total Inventory Items: **{estimated_count_inventory_items()}**")
     if st.button("Add New Inventory Item", key="btn_add_inventory_item"):
         st.session_state.current_page = 'add_item'
         st.rerun()
@@ -35,21 +35,18 @@ def manage_users_page():
         return
 
     st.subheader("Manage Users")
-    users = load_users() # Use MongoDB load_users
+    users_frame = get_users_frame() # Columnar read of id/username/role
 
-    if users:
-        # Create a DataFrame for display
-        users_df = pd.DataFrame([
-            {'ID': str(user['_id']), 'Username': user['username'], 'Role': user['role']}
-            for user in users
-        ])
-        st.dataframe(users_df, hide_index=True, use_container_width=True)
+    if not users_frame.empty:
+        # Rename the columns for display; no per-user dicts are built
+        users_df = users_frame.rename(columns={'id': 'ID', 'username': 'Username', 'role': 'Role'})
+        st.dataframe(users_df, hide_index=True, width="stretch")
 
         st.markdown("---")
         st.markdown("#### Edit/Delete User")
 
         # Dropdown to select user for editing/deletion
-        user_options = {user['username']: str(user['_id']) for user in users}
+        user_options = dict(zip(users_frame['username'], users_frame['id']))
         selected_username = st.selectbox("Select User", options=list(user_options.keys()), key="select_user_to_manage")
         selected_user_id = user_options[selected_username]
 
@@ -66,8 +63,7 @@ def manage_users_page():
                     # Prevent deleting the only admin account
                     user_to_delete = find_user_by_id(selected_user_id)
                     if user_to_delete and user_to_delete['role'] == 'admin':
-                        admin_count = sum(1 for u in users if u['role'] == 'admin')
-                        if admin_count == 1:
+                        if count_admins() == 1:
                             st.error("You cannot delete the only administrator account.")
                             st.session_state[f'confirm_delete_user_{selected_user_id}'] = False # Reset confirmation
                             st.rerun()
@@ -84,8 +80,7 @@ def manage_users_page():
                     if st.button("Confirm Delete", key=f"confirm_del_user_action_btn_{selected_user_id}"):
                         user_to_delete = find_user_by_id(selected_user_id)
                         if user_to_delete and user_to_delete['role'] == 'admin':
-                            admin_count = sum(1 for u in users if u['role'] == 'admin')
-                            if admin_count == 1:
+                            if count_admins() == 1:
                                 st.error("You cannot delete the only administrator account.")
                                 st.session_state[f'confirm_delete_user_{selected_user_id}'] = False # Reset confirmation
                                 st.rerun()
@@ -124,7 +119,6 @@ def edit_user_page():
         return
 
     st.subheader(f"Edit User: {user_to_edit['username']}")
-    users = load_users() # Load all users to check for duplicate usernames
 
     with st.form("edit_user_form"):
         new_username = st.text_input("Username", value=user_to_edit['username'], key="edit_username")
@@ -136,14 +130,13 @@ def edit_user_page():
         if submitted:
             # Prevent demoting the only admin
             if user_to_edit['role'] == 'admin' and new_role == 'user':
-                admin_count = sum(1 for u in users if u['role'] == 'admin')
-                if admin_count == 1:
+                if count_admins() == 1:
                     st.error("You cannot demote the only administrator account.")
                     st.stop()
             
             # Check for duplicate username if the username is changed
             if new_username.lower() != user_to_edit['username'].lower():
-                if any(u['username'].lower() == new_username.lower() for u in users if str(u['_id']) != user_id): # Compare against other user IDs
+                if exists_username_ci(new_username, exclude_user_id=user_id): # Indexed, case-insensitive lookup
                     st.error('Username already exists. Please choose a different one.')
                     st.stop()
             
@@ -0,0 +1,122 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import db_operations
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx, add_script_run_ctx
+except ImportError: # Older Streamlit versions; worker threads then run without a script context
+    get_script_run_ctx = lambda suppress_warning=False: None
+    add_script_run_ctx = lambda thread=None, ctx=None: thread
+
+# --- Concurrent Data Layer ---
+# The shared MongoClient (and the local storage backends) are thread-safe and pooled, so
+# independent reads can run side by side on worker threads. Running them through the
+# regular db_operations functions keeps the read cache and backend selection in effect.
+# Dashboard wall time then becomes roughly the slowest query instead of the sum of all of them.
+
+def _get_max_workers():
+    """
+    Size of the shared worker pool. It matches the MongoClient's maxPoolSize, so every session's
+    queries can hold a pooled connection at once instead of queueing behind a few threads.
+    Threads are only started when needed, so an idle process does not pay for the full pool.
+    """
+    return max(db_operations.get_mongo_client_settings()['maxPoolSize'], 1)
+
+def _get_call_concurrency():
+    """Number of calls a single fetch_concurrently() runs at the same time (DB_CONCURRENCY, default 8)."""
+    try:
+        return max(int(os.getenv("DB_CONCURRENCY", "8")), 1)
+    except ValueError:
+        return 8
+
+_executor = ThreadPoolExecutor(max_workers=_get_max_workers(), thread_name_prefix="db-io")
+
+
+# Thread attribute add_script_run_ctx stores the context in; deleting it detaches the context again
+_SCRIPT_RUN_CONTEXT_ATTR = "streamlit_script_run_ctx"
+
+def _call_with_context(ctx, func, *args, **kwargs):
+    """
+    Runs func on a worker thread with the caller's Streamlit context, so st.error/st.stop still work there.
+    Pool threads are shared by all sessions, so the thread's previous context is restored afterwards.
+    """
+    if ctx is None:
+        return func(*args, **kwargs)
+    thread = threading.current_thread()
+    previous_ctx = get_script_run_ctx(suppress_warning=True)
+    add_script_run_ctx(thread, ctx)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        if previous_ctx is not None:
+            add_script_run_ctx(thread, previous_ctx)
+        elif hasattr(thread, _SCRIPT_RUN_CONTEXT_ATTR):
+            delattr(thread, _SCRIPT_RUN_CONTEXT_ATTR)
+
+async def run_in_db_executor(func, *args, **kwargs):
+    """Awaits a synchronous db_operations function on the database worker pool."""
+    loop = asyncio.get_running_loop()
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return await loop.run_in_executor(_executor, functools.partial(_call_with_context, ctx, func, *args, **kwargs))
+
+def _make_async(func):
+    """Builds the `<name>_async` coroutine variant of a db_operations read function."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_in_db_executor(func, *args, **kwargs)
+    wrapper.__name__ = wrapper.__qualname__ = f"{func.__name__}_async"
+    wrapper.__doc__ = f"Async variant of db_operations.{func.__name__}(). {func.__doc__ or ''}".strip()
+    return wrapper
+
+
+# --- Async Read Functions ---
+load_users_async = _make_async(db_operations.load_users)
+count_users_async = _make_async(db_operations.count_users)
+find_user_by_username_async = _make_async(db_operations.find_user_by_username)
+find_user_by_id_async = _make_async(db_operations.find_user_by_id)
+
+get_all_inventory_items_async = _make_async(db_operations.get_all_inventory_items)
+query_inventory_items_async = _make_async(db_operations.query_inventory_items)
+get_inventory_summary_async = _make_async(db_operations.get_inventory_summary)
+get_low_stock_items_async = _make_async(db_operations.get_low_stock_items)
+find_inventory_item_by_id_async = _make_async(db_operations.find_inventory_item_by_id)
+
+get_all_suppliers_async = _make_async(db_operations.get_all_suppliers)
+count_suppliers_async = _make_async(db_operations.count_suppliers)
+find_supplier_by_id_async = _make_async(db_operations.find_supplier_by_id)
+find_suppliers_by_category_async = _make_async(db_operations.find_suppliers_by_category)
+get_supplier_contacts_by_category_async = _make_async(db_operations.get_supplier_contacts_by_category)
+
+get_suppliers_frame_async = _make_async(db_operations.get_suppliers_frame)
+get_users_frame_async = _make_async(db_operations.get_users_frame)
+
+
+# --- Helpers for Synchronous Streamlit Pages ---
+def fetch_concurrently(**calls):
+    """
+    Runs independent database calls at the same time from synchronous code.
+    Each keyword maps a result name to a (function, *args) tuple, e.g.
+        fetch_concurrently(users=(count_users,), summary=(get_inventory_summary, 5))
+    Returns a dict of result name -> return value. The first exception raised by any call is re-raised.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    # The limit is per call, not per process: one page fanning out many queries cannot
+    # occupy the whole pool, and other sessions' pages are not serialized behind it.
+    slots = threading.BoundedSemaphore(_get_call_concurrency())
+    futures = {}
+    for name, call in calls.items():
+        slots.acquire()
+        future = _executor.submit(_call_with_context, ctx, call[0], *call[1:])
+        future.add_done_callback(lambda _future: slots.release())
+        futures[name] = future
+    return {name: future.result() for name, future in futures.items()}
+
+def run_async(*awaitables):
+    """Runs coroutines concurrently from synchronous code and returns their results in order."""
+    async def gather():
+        return await asyncio.gather(*awaitables)
+    return asyncio.run(gather())
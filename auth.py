@@ -2,7 +2,7 @@ import streamlit as st
 import uuid
 from werkzeug.security import generate_password_hash, check_password_hash # Changed back to werkzeug.security
 # Import MongoDB functions
-from db_operations import load_users, add_user, find_user_by_username
+from db_operations import add_user, find_user_by_username, exists_username_ci
 
 def login_page():
     st.subheader("Login")
@@ -48,7 +48,7 @@ def register_page():
                 st.error('Password must be at least 6 characters long.')
             else:
                 # Use MongoDB function to check if username exists
-                if find_user_by_username(username):
+                if exists_username_ci(username):
                     st.error('Username already exists. Please choose a different one.')
                 else:
                     # Hash password using generate_password_hash
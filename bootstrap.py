@@ -0,0 +1,93 @@
+import threading
+import time
+
+from db_operations import find_user_by_username, add_user, find_inventory_items_pending_pdf
+from db_migrations import run_startup_migrations
+from change_watcher import start_cache_watcher
+from utils import ensure_dirs, get_default_admin_credentials
+
+# --- Process Bootstrap ---
+# Startup work (directories, indexes and migrations, the cache watcher, the default admin and
+# resuming pending PDF renders) runs once per server process instead of on every rerun of
+# every session. Steady-state reruns only check a module-level flag. If a step fails (e.g. the
+# database is unreachable and the page is stopped), nothing is marked done and the next rerun
+# tries again.
+_bootstrap_lock = threading.Lock()
+_bootstrap_result = None
+_pending_notices = [] # (level, message) pairs shown once, to the first session that renders after bootstrap
+
+
+def ensure_default_admin():
+    """Creates the default admin user from the .env credentials if it doesn't exist. Returns True when it was created."""
+    default_admin_username, default_admin_password = get_default_admin_credentials()
+    if find_user_by_username(default_admin_username):
+        return False
+    from werkzeug.security import generate_password_hash # Only needed the one time the admin is created
+    admin_user = {
+        'username': default_admin_username,
+        'password': generate_password_hash(default_admin_password),
+        'role': 'admin'
+    }
+    add_user(admin_user)
+    return True
+
+def resume_pending_pdfs(limit=1000):
+    """
+    Re-queues PDFs left pending by a previous process (e.g. a restart mid-render).
+    Runs on a background thread, and only imports pdf_service (ReportLab) and starts its workers
+    when something is actually pending, so processes that only serve logins don't pay for them.
+    """
+    def _resume():
+        try:
+            if not find_inventory_items_pending_pdf(1):
+                return
+            from pdf_service import enqueue_pending_item_pdfs
+            queued = enqueue_pending_item_pdfs(limit)
+            if queued:
+                print(f"Queued {queued} pending item PDFs for background rendering.")
+        except Exception as e:
+            print(f"Warning: Could not queue pending item PDFs: {e}")
+    threading.Thread(target=_resume, name="pdf-resume", daemon=True).start()
+
+def bootstrap():
+    """
+    Runs the one-time process startup exactly once, even when several sessions start together.
+    Returns a dict with 'ready', 'problems' (migration problems), 'admin_created' and 'duration_seconds'.
+    """
+    global _bootstrap_result
+    if _bootstrap_result is not None:
+        if _bootstrap_result['problems'] and not run_startup_migrations():
+            # A failed migration is retried on later reruns (run_startup_migrations throttles the attempts)
+            _bootstrap_result = {**_bootstrap_result, 'problems': []}
+        return _bootstrap_result # Steady state: no I/O at all
+    with _bootstrap_lock:
+        if _bootstrap_result is None:
+            started = time.perf_counter()
+            ensure_dirs() # Set up the static/pdfs and static/images directories and the placeholder image
+            problems = run_startup_migrations() # Create/verify MongoDB indexes and apply schema migrations
+            start_cache_watcher() # Keep this process's read cache in sync with writes made by other replicas
+            admin_created = ensure_default_admin()
+            resume_pending_pdfs() # Start the PDF workers on anything an earlier process left pending
+
+            _pending_notices.extend(('warning', problem) for problem in problems)
+            if admin_created:
+                _pending_notices.append(('success', "Default admin user created. Please log in."))
+            _bootstrap_result = {
+                'ready': True,
+                'problems': problems,
+                'admin_created': admin_created,
+                'duration_seconds': time.perf_counter() - started
+            }
+            print(f"Bootstrap finished in {_bootstrap_result['duration_seconds']:.2f}s.")
+    return _bootstrap_result
+
+def is_ready():
+    """True once the process bootstrap has completed (useful for health checks)."""
+    return _bootstrap_result is not None
+
+def take_bootstrap_notices():
+    """Returns the startup messages that have not been shown yet, and clears them."""
+    with _bootstrap_lock:
+        notices = list(_pending_notices)
+        _pending_notices.clear()
+    return notices
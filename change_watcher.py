@@ -0,0 +1,172 @@
+import argparse
+import os
+import threading
+import time
+from pymongo.errors import OperationFailure
+
+from db_operations import (
+    get_mongo_database, get_storage_backend_name, invalidate_local_cache, enable_cache_version_publishing,
+    CACHED_COLLECTIONS, CACHE_VERSIONS_COLLECTION
+)
+
+# Server error code returned when change streams are used without a replica set
+CHANGE_STREAMS_UNSUPPORTED_CODES = {40573}
+RETRY_DELAY_SECONDS = 5
+# A steady stream of changes never leaves the change stream idle, so batched invalidations
+# are also flushed after this many events or this many seconds since the first pending one.
+FLUSH_MAX_EVENTS = 100
+FLUSH_MAX_DELAY_SECONDS = 1.0
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def get_cache_sync_mode():
+    """
+    Returns how replicas keep their caches in sync (CACHE_SYNC_MODE):
+    'auto' (change streams, falling back to polling), 'change_stream', 'poll' or 'off'.
+    """
+    mode = os.getenv("CACHE_SYNC_MODE", "auto").strip().lower()
+    if mode not in ('auto', 'change_stream', 'poll', 'off'):
+        print(f"Warning: CACHE_SYNC_MODE={mode!r} is not valid. Using 'auto'.")
+        return 'auto'
+    return mode
+
+def get_poll_interval():
+    """Seconds between version checks in polling mode (CACHE_POLL_INTERVAL_SECONDS, default 2)."""
+    try:
+        return max(float(os.getenv("CACHE_POLL_INTERVAL_SECONDS", "2")), 0.1)
+    except ValueError:
+        return 2.0
+
+
+class CacheWatcher(threading.Thread):
+    """
+    Background thread that invalidates this process's read cache when another replica
+    changes the watched collections. Uses a change stream on the database where available,
+    otherwise polls the shared version counters in the cache_versions collection.
+    """
+
+    def __init__(self, db=None, mode='auto', collections=CACHED_COLLECTIONS, poll_interval=2.0, on_invalidate=None):
+        super().__init__(name="cache-watcher", daemon=True)
+        self.db = db
+        self.mode = mode
+        self.collections = tuple(collections)
+        self.poll_interval = poll_interval
+        # Callback receiving the set of invalidated collections; defaults to the db_operations cache
+        self.on_invalidate = on_invalidate or (lambda collections: invalidate_local_cache(*collections))
+        self.active_mode = None # 'change_stream' or 'poll' once running
+        self.ready = threading.Event() # Set once the stream is open / first versions are read
+        self._stop_event = threading.Event()
+        self._resume_token = None
+
+    def stop(self):
+        """Asks the watcher to stop; it exits within about a second."""
+        self._stop_event.set()
+
+    def run(self):
+        db = self.db
+        mode = self.mode
+        while not self._stop_event.is_set():
+            try:
+                if db is None:
+                    db = get_mongo_database() # Inside the loop: a missing MONGO_URI or unreachable server is retried
+                if mode in ('auto', 'change_stream'):
+                    self.active_mode = 'change_stream'
+                    self._watch_change_stream(db)
+                else:
+                    self.active_mode = 'poll'
+                    enable_cache_version_publishing(True)
+                    self._poll_versions(db)
+            except OperationFailure as e:
+                if mode == 'auto' and e.code in CHANGE_STREAMS_UNSUPPORTED_CODES:
+                    print("Change streams are not available (no replica set). Falling back to polling cache versions.")
+                    mode = 'poll'
+                    continue
+                self._recover(e)
+            except Exception as e: # Never let the thread die: this process would keep serving stale reads
+                self._recover(e)
+
+    def _recover(self, error):
+        """After an error we may have missed changes: invalidate everything, start a fresh stream and retry."""
+        print(f"Cache watcher error: {error}. Retrying in {RETRY_DELAY_SECONDS}s.")
+        self._invalidate(self.collections)
+        self._resume_token = None # The token may be the reason we failed (e.g. history lost)
+        self._stop_event.wait(RETRY_DELAY_SECONDS)
+
+    def _invalidate(self, collections):
+        if collections:
+            self.on_invalidate(set(collections))
+
+    def _watch_change_stream(self, db):
+        """Follows a database-level change stream and invalidates the collections that changed."""
+        pipeline = [{'$match': {'ns.coll': {'$in': list(self.collections)}}}]
+        with db.watch(pipeline, resume_after=self._resume_token, max_await_time_ms=1000) as stream:
+            self.ready.set()
+            pending = set()
+            pending_events = 0
+            pending_since = None
+            while not self._stop_event.is_set() and stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    pending.add(change['ns']['coll'])
+                    pending_events += 1
+                    if pending_since is None:
+                        pending_since = time.monotonic()
+                    self._resume_token = stream.resume_token
+                    # Drain bursts (e.g. bulk imports) before invalidating once, but never for longer than the limits
+                    if pending_events < FLUSH_MAX_EVENTS and time.monotonic() - pending_since < FLUSH_MAX_DELAY_SECONDS:
+                        continue
+                self._invalidate(pending)
+                pending = set()
+                pending_events = 0
+                pending_since = None
+
+    def _poll_versions(self, db):
+        """Polls the shared version counters and invalidates collections whose counter moved."""
+        versions_collection = db[CACHE_VERSIONS_COLLECTION]
+        last_seen = None
+        while not self._stop_event.is_set():
+            current = {doc['_id']: doc.get('version', 0)
+                       for doc in versions_collection.find({'_id': {'$in': list(self.collections)}})}
+            if last_seen is not None:
+                self._invalidate({c for c in self.collections if current.get(c, 0) != last_seen.get(c, 0)})
+            last_seen = current
+            self.ready.set()
+            self._stop_event.wait(self.poll_interval)
+
+
+def start_cache_watcher():
+    """
+    Starts the cache watcher once per server process (later calls return the running watcher).
+    Returns None when CACHE_SYNC_MODE is 'off' or a local (non-MongoDB) storage backend is configured.
+    """
+    global _watcher
+    with _watcher_lock:
+        if (_watcher is None or not _watcher.is_alive()) and get_cache_sync_mode() != 'off' and get_storage_backend_name() == 'mongodb':
+            _watcher = CacheWatcher(mode=get_cache_sync_mode(), poll_interval=get_poll_interval())
+            _watcher.start()
+        return _watcher
+
+
+def main(argv=None):
+    """Runs the watcher in the foreground and prints every invalidation (useful against a local replica set)."""
+    parser = argparse.ArgumentParser(description="Watch the inventory database and print cache invalidations.")
+    parser.add_argument('--mode', choices=['auto', 'change_stream', 'poll'], default=get_cache_sync_mode() if get_cache_sync_mode() != 'off' else 'auto')
+    args = parser.parse_args(argv)
+
+    watcher = CacheWatcher(mode=args.mode, poll_interval=get_poll_interval(),
+                           on_invalidate=lambda collections: print(f"Invalidated: {', '.join(sorted(collections))}"))
+    watcher.start()
+    watcher.ready.wait(30)
+    print(f"Watching {', '.join(watcher.collections)} using {watcher.active_mode}. Press Ctrl+C to stop.")
+    try:
+        while watcher.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        watcher.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,300 @@
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+from db_operations import (
+    iter_inventory_items, count_inventory_items, invalidate_local_cache,
+    get_report_snapshots, save_report_snapshots, delete_report_snapshots, iter_report_snapshots,
+    get_daily_report_summary, get_latest_daily_report_summary, save_daily_report_summary
+)
+from storage_backends import utc_now, as_utc
+from utils import get_pdf_dir, get_low_stock_threshold, get_currency_symbol
+
+# --- Incremental Daily Report ---
+# Each run starts from the previous day's stored summary (totals) and the per-item snapshots
+# written by earlier runs. Only items whose updated_at is newer than the previous run are read
+# and compared with their snapshot, so a night's work grows with the day's changes, not with
+# the catalog. Removed items are found from the item count: only when the count shows that
+# items disappeared are the snapshot ids compared with the current ids.
+# The first run (or --full, or a changed low stock threshold) scans every item once to build
+# the baseline. Snapshot updates are written only after the whole day has been processed, so
+# a run that fails halfway can simply be repeated.
+DAILY_REPORT_PREFIX = "Daily_Inventory_Report"
+SNAPSHOT_FIELDS = ('name', 'category', 'quantity', 'price')
+CHANGE_BATCH_SIZE = 500 # Changed items compared per snapshot lookup
+MAX_LISTED_CHANGES = 500 # Entries kept per change list (counts are always complete)
+CLOCK_SKEW_SECONDS = 300 # Re-read a few minutes before the previous run; unchanged items compare equal
+CHANGE_KINDS = ('quantity_changes', 'new_items', 'removed_items', 'became_low', 'recovered')
+
+_EMPTY_TOTALS = {'items': 0, 'total_quantity': 0, 'total_value': 0.0, 'low_stock_count': 0}
+
+
+def _snapshot(item, low_stock_threshold):
+    quantity = item.get('quantity', 0)
+    return {
+        'name': item.get('name', ''),
+        'category': item.get('category') or 'N/A',
+        'quantity': quantity,
+        'price': float(item.get('price', 0.0)),
+        'low': quantity <= low_stock_threshold
+    }
+
+def _add_to_totals(totals, snapshot, sign):
+    totals['items'] += sign
+    totals['total_quantity'] += sign * snapshot['quantity']
+    totals['total_value'] += sign * snapshot['quantity'] * snapshot['price']
+    totals['low_stock_count'] += sign * int(snapshot['low'])
+
+def _to_datetime(value):
+    """Summaries store as_of as a datetime (MongoDB, memory) or an ISO string (SQLite)."""
+    return as_utc(datetime.fromisoformat(value) if isinstance(value, str) else value)
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def compute_daily_summary(report_date=None, full=False):
+    """
+    Computes (and stores) the summary for report_date ('YYYY-MM-DD', default today): totals plus
+    quantity changes, new and removed items and low stock transitions since the previous summary.
+    A summary that was already stored for the date is returned as is unless full=True.
+    """
+    report_date = report_date or date.today().isoformat()
+    if not full:
+        existing = get_daily_report_summary(report_date)
+        if existing:
+            return existing
+
+    started = time.perf_counter()
+    invalidate_local_cache('inventory') # The item count below must not come from an old cached read
+    low_stock_threshold = get_low_stock_threshold()
+    as_of = utc_now()
+    previous = get_latest_daily_report_summary(report_date)
+    incremental = not full and previous is not None and previous.get('low_stock_threshold') == low_stock_threshold
+    since = _to_datetime(previous['as_of']) - timedelta(seconds=CLOCK_SKEW_SECONDS) if incremental else None
+    totals = dict(previous['totals']) if incremental else dict(_EMPTY_TOTALS)
+    list_changes = previous is not None # The very first report is only a baseline
+
+    changes = {kind: [] for kind in CHANGE_KINDS}
+    change_counts = {kind: 0 for kind in CHANGE_KINDS}
+
+    def record(kind, entry):
+        change_counts[kind] += 1
+        if list_changes and len(changes[kind]) < MAX_LISTED_CHANGES:
+            changes[kind].append(entry)
+
+    pending_snapshots = {}
+    seen_ids = None if incremental else set()
+    scanned = 0
+    items = iter_inventory_items(batch_size=CHANGE_BATCH_SIZE, projection=SNAPSHOT_FIELDS, updated_since=since)
+    for batch in _batched(items, CHANGE_BATCH_SIZE):
+        stored_snapshots = get_report_snapshots([item['id'] for item in batch])
+        for item in batch:
+            scanned += 1
+            current = _snapshot(item, low_stock_threshold)
+            old = stored_snapshots.get(item['id'])
+            if seen_ids is not None:
+                seen_ids.add(item['id'])
+                _add_to_totals(totals, current, 1) # Full scan: totals are summed from scratch
+            if old == current:
+                continue
+            pending_snapshots[item['id']] = current
+            if incremental:
+                if old is not None:
+                    _add_to_totals(totals, old, -1)
+                _add_to_totals(totals, current, 1)
+
+            name, category = current['name'], current['category']
+            if old is None:
+                record('new_items', [name, category, current['quantity']])
+                if current['low']:
+                    record('became_low', [name, category, current['quantity']])
+                continue
+            if old['quantity'] != current['quantity']:
+                record('quantity_changes', [name, category, old['quantity'], current['quantity']])
+            if current['low'] and not old['low']:
+                record('became_low', [name, category, current['quantity']])
+            elif old['low'] and not current['low']:
+                record('recovered', [name, category, current['quantity']])
+
+    # Removed items: in incremental mode only look when the count says some are missing
+    current_ids = seen_ids
+    if incremental and previous['totals']['items'] + change_counts['new_items'] > count_inventory_items():
+        current_ids = {item['id'] for item in iter_inventory_items(batch_size=2000, projection=['quantity'])}
+    removed_ids = []
+    if current_ids is not None:
+        for snapshot in iter_report_snapshots(batch_size=2000):
+            if snapshot['id'] in current_ids:
+                continue
+            removed_ids.append(snapshot['id'])
+            record('removed_items', [snapshot['name'], snapshot['category'], snapshot['quantity']])
+            if incremental:
+                _add_to_totals(totals, snapshot, -1)
+
+    totals['total_value'] = round(totals['total_value'], 2)
+    summary = {
+        'report_date': report_date,
+        'as_of': as_of,
+        'mode': 'incremental' if incremental else 'full',
+        'baseline': not list_changes,
+        'low_stock_threshold': low_stock_threshold,
+        'totals': totals,
+        'previous_report_date': previous['report_date'] if previous else None,
+        'previous_totals': previous['totals'] if previous else None,
+        'change_counts': change_counts,
+        'changes': changes,
+        'scanned_items': scanned,
+        'duration_seconds': time.perf_counter() - started
+    }
+    # Advance the snapshots only once the whole day has been processed, then record the summary
+    save_report_snapshots(pending_snapshots)
+    delete_report_snapshots(removed_ids)
+    save_daily_report_summary(summary)
+    return summary
+
+
+def render_daily_report_pdf(summary, output_path=None):
+    """Writes the daily report PDF for a summary. Returns the PDF path."""
+    pdf_filename = f"{DAILY_REPORT_PREFIX}_{summary['report_date']}.pdf"
+    output_path = output_path or os.path.join(get_pdf_dir(), pdf_filename)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    styles = getSampleStyleSheet()
+    currency_symbol = get_currency_symbol()
+    table_style = TableStyle([
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+        ('ALIGN', (2, 0), (-1, -1), 'RIGHT'),
+    ])
+    story = [
+        Paragraph(f"Daily Inventory Report - {summary['report_date']}", styles['h1']),
+        Paragraph(f"Generated {_to_datetime(summary['as_of']):%Y-%m-%d %H:%M} UTC "
+                  f"({summary['mode']} run, low stock threshold {summary['low_stock_threshold']})", styles['Normal']),
+        Spacer(1, 0.2 * inch)
+    ]
+
+    # Totals against the previous report
+    totals, previous_totals = summary['totals'], summary.get('previous_totals')
+    rows = [["Metric", "", "Previous", "Today", "Change"]]
+    for key, label, money in (('items', "Items", False), ('total_quantity', "Units in stock", False),
+                              ('total_value', "Inventory value", True), ('low_stock_count', "Low stock items", False)):
+        fmt = (lambda value: f"{currency_symbol}{value:,.2f}") if money else (lambda value: f"{value:,}")
+        today = totals[key]
+        if previous_totals:
+            rows.append([label, "", fmt(previous_totals[key]), fmt(today), f"{'+' if today >= previous_totals[key] else '-'}{fmt(abs(today - previous_totals[key]))}"])
+        else:
+            rows.append([label, "", "-", fmt(today), "-"])
+    story += [Table(rows, colWidths=[2 * inch, 0.5 * inch, 1.5 * inch, 1.5 * inch, 1.5 * inch], style=table_style), Spacer(1, 0.3 * inch)]
+
+    if summary.get('baseline'):
+        story.append(Paragraph("This is the first report: it records the baseline that later reports are compared with.", styles['Normal']))
+    else:
+        sections = (
+            ('quantity_changes', "Quantity Changes", ["Item", "Category", "Before", "After"]),
+            ('new_items', "New Items", ["Item", "Category", "Quantity"]),
+            ('removed_items', "Removed Items", ["Item", "Category", "Last Quantity"]),
+            ('became_low', "Now Low on Stock", ["Item", "Category", "Quantity"]),
+            ('recovered', "No Longer Low on Stock", ["Item", "Category", "Quantity"]),
+        )
+        for kind, title, header in sections:
+            count = summary['change_counts'][kind]
+            story.append(Paragraph(f"{title} ({count})", styles['h3']))
+            entries = summary['changes'][kind]
+            if entries:
+                rows = [header] + [[str(value) for value in entry] for entry in entries]
+                story.append(Table(rows, colWidths=[2.6 * inch, 1.6 * inch] + [1.1 * inch] * (len(header) - 2),
+                                   style=table_style, repeatRows=1))
+                if count > len(entries):
+                    story.append(Paragraph(f"<i>... and {count - len(entries)} more.</i>", styles['Normal']))
+            else:
+                story.append(Paragraph("<i>None.</i>", styles['Normal']))
+            story.append(Spacer(1, 0.15 * inch))
+
+    SimpleDocTemplate(output_path, pagesize=letter).build(story)
+    return output_path
+
+def get_daily_report_recipient():
+    """Address the daily report is sent to (DAILY_REPORT_EMAIL, default ADMIN_EMAIL_ADDRESS)."""
+    return os.getenv("DAILY_REPORT_EMAIL") or os.getenv("ADMIN_EMAIL_ADDRESS")
+
+def run_daily_report(report_date=None, full=False, send_email=True):
+    """Computes the day's summary, writes the PDF and emails it. Returns (summary, pdf_path, emailed)."""
+    summary = compute_daily_summary(report_date, full=full)
+    pdf_path = render_daily_report_pdf(summary)
+    emailed = False
+    if send_email:
+        recipient = get_daily_report_recipient()
+        if recipient:
+            from notification_service import send_daily_report_email # Only the delivery step needs the SMTP helpers
+            emailed = send_daily_report_email(recipient, pdf_path, os.path.basename(pdf_path))
+        else:
+            print("Warning: No DAILY_REPORT_EMAIL or ADMIN_EMAIL_ADDRESS configured; the report was not emailed.")
+    return summary, pdf_path, emailed
+
+
+# --- Scheduling ---
+def get_daily_report_time():
+    """Local time of day for the scheduled run (DAILY_REPORT_TIME, 'HH:MM', default 23:55)."""
+    value = os.getenv("DAILY_REPORT_TIME", "23:55")
+    try:
+        return datetime.strptime(value, "%H:%M").time()
+    except ValueError:
+        print(f"Warning: DAILY_REPORT_TIME={value!r} is not HH:MM. Using 23:55.")
+        return datetime.strptime("23:55", "%H:%M").time()
+
+def run_scheduler(run_at=None, send_email=True):
+    """Runs the daily report every day at run_at (a datetime.time) until interrupted. For setups without cron."""
+    run_at = run_at or get_daily_report_time()
+    while True:
+        now = datetime.now()
+        next_run = datetime.combine(now.date(), run_at)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        print(f"Next daily report at {next_run:%Y-%m-%d %H:%M}.")
+        time.sleep((next_run - now).total_seconds())
+        try:
+            summary, pdf_path, _ = run_daily_report(next_run.date().isoformat(), send_email=send_email)
+            print(f"Wrote {pdf_path} ({summary['scanned_items']} items read in {summary['duration_seconds']:.1f}s).")
+        except Exception as e:
+            print(f"Warning: Daily report failed: {e}")
+
+
+def main(argv=None):
+    """Command line entry point: python daily_report.py [--date YYYY-MM-DD] [--full] [--no-email] [--schedule [HH:MM]]"""
+    parser = argparse.ArgumentParser(description="Build the incremental daily inventory report and email it.")
+    parser.add_argument('--date', help="Report date (YYYY-MM-DD, default today).")
+    parser.add_argument('--full', action='store_true', help="Rescan every item and recompute the totals.")
+    parser.add_argument('--no-email', action='store_true', help="Only write the PDF.")
+    parser.add_argument('--schedule', nargs='?', const='', metavar='HH:MM',
+                        help="Keep running and build the report every day (default time: DAILY_REPORT_TIME).")
+    args = parser.parse_args(argv)
+
+    if args.schedule is not None:
+        run_at = datetime.strptime(args.schedule, "%H:%M").time() if args.schedule else None
+        run_scheduler(run_at, send_email=not args.no_email)
+        return 0
+
+    summary, pdf_path, emailed = run_daily_report(args.date, full=args.full, send_email=not args.no_email)
+    counts = summary['change_counts']
+    print(f"Wrote {pdf_path}: {summary['mode']} run read {summary['scanned_items']} items in {summary['duration_seconds']:.2f}s; "
+          f"{counts['quantity_changes']} quantity changes, {counts['new_items']} new, {counts['removed_items']} removed, "
+          f"{counts['became_low']} now low, {counts['recovered']} recovered.")
+    return 0 if emailed or args.no_email else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
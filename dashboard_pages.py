@@ -1,15 +1,12 @@
 import streamlit as st
+import os
 import pandas as pd
-import re # Import regex for email validation
 
 # Import MongoDB functions
-from db_operations import get_all_inventory_items, get_all_suppliers, load_users, find_suppliers_by_category
+from db_operations import get_inventory_summary, get_low_stock_items, count_users, count_suppliers, get_supplier_contacts_by_category
 from utils import get_low_stock_threshold, get_currency_symbol, ITEM_CATEGORIES
 from notification_service import send_low_stock_notification
-
-def is_valid_email(email):
-    """Basic regex for email validation."""
-    return re.match(r"[^@]+@[^@]+\.[^@]+", email)
+from async_db_operations import fetch_concurrently
 
 def show_dashboard_page():
     """Renders the main dashboard for inventory overview and reports."""
@@ -19,54 +16,43 @@ def show_dashboard_page():
 
     st.subheader("Dashboard Overview")
 
-    inventory = get_all_inventory_items() # Use MongoDB function
-    users = load_users() # Use MongoDB function
-    suppliers = get_all_suppliers() # Use MongoDB function
     low_stock_threshold = get_low_stock_threshold()
     currency_symbol = get_currency_symbol()
+    # All dashboard queries are independent, so they run concurrently (about one round trip in total).
+    # Metrics are aggregated by MongoDB instead of loading every document.
+    results = fetch_concurrently(
+        summary=(get_inventory_summary, low_stock_threshold),
+        low_stock_items=(get_low_stock_items, low_stock_threshold),
+        supplier_contacts=(get_supplier_contacts_by_category, set(ITEM_CATEGORIES)),
+        user_count=(count_users,),
+        supplier_count=(count_suppliers,)
+    )
+    summary = results['summary']
+    low_stock_items = results['low_stock_items']
 
     # --- Key Metrics ---
     st.markdown("### Key Metrics")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric(label="Total Inventory Items", value=len(inventory))
+        st.metric(label="Total Inventory Items", value=summary['total_items'])
     with col2:
-        total_value = sum(item['quantity'] * item['price'] for item in inventory)
+        total_value = summary['total_value']
         st.metric(label="Total Inventory Value", value=f"{currency_symbol}{total_value:,.2f}")
     with col3:
-        low_stock_items = [item for item in inventory if item['quantity'] <= low_stock_threshold]
-        st.metric(label="Low Stock Items", value=len(low_stock_items))
+        st.metric(label="Low Stock Items", value=summary['low_stock_count'])
 
     st.markdown("---")
 
     # --- Low Stock Alerts ---
     st.markdown("### Low Stock Alerts")
     if low_stock_items:
+        # Suppliers for the standard categories were fetched above; only custom categories need another query
+        supplier_contacts = dict(results['supplier_contacts'])
+        missing_categories = {item.get('category') for item in low_stock_items} - set(supplier_contacts)
+        if any(missing_categories):
+            supplier_contacts.update(get_supplier_contacts_by_category(missing_categories))
         for item in low_stock_items:
-            selected_item_id = item['id'] # Use the 'id' field
-            st.warning(f"Item **{item['name']}** is low in stock! Quantity: {item['quantity']}")
-            
-            # Option to notify supplier or admin
-            item_category = item.get('category')
-            if item_category:
-                relevant_suppliers = find_suppliers_by_category(item_category)
-                supplier_emails = [s['email'] for s in relevant_suppliers if s.get('email') and is_valid_email(s['email'])]
-                supplier_names = [s['name'] for s in relevant_suppliers if s.get('email') and is_valid_email(s['email'])]
-
-                if supplier_emails:
-                    if st.button(f"Notify Supplier(s) for {item['name']}", key=f"dashboard_notify_supplier_{selected_item_id}"):
-                        send_low_stock_notification(item, supplier_emails=supplier_emails, supplier_name=", ".join(supplier_names))
-                        st.rerun()
-                else:
-                    st.info(f"No supplier with a valid email found for category '{item_category}'.")
-                    if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_{selected_item_id}"):
-                        send_low_stock_notification(item) # Fallback to admin email
-                        st.rerun()
-            else:
-                st.info(f"Item '{item['name']}' has no category. Cannot find specific supplier.")
-                if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_no_category_{selected_item_id}"):
-                    send_low_stock_notification(item) # Fallback to admin email
-                    st.rerun()
+            _render_low_stock_alert(item, supplier_contacts)
     else:
         st.info("No items are currently low in stock.")
 
@@ -74,15 +60,10 @@ def show_dashboard_page():
 
     # --- Inventory Distribution by Category (Simple Chart/Table) ---
     st.markdown("### Inventory Distribution by Category")
-    if inventory:
-        # Ensure 'category' column exists, fill missing with 'N/A' for plotting
-        inventory_df = pd.DataFrame(inventory)
-        if 'category' not in inventory_df.columns:
-            inventory_df['category'] = 'N/A'
-        
-        category_counts = inventory_df['category'].value_counts().reset_index()
-        category_counts.columns = ['Category', 'Number of Items']
-        st.dataframe(category_counts, hide_index=True, use_container_width=True)
+    if summary['category_counts']:
+        # Counts per category come from the aggregation (missing categories are grouped as 'N/A')
+        category_counts = pd.DataFrame(summary['category_counts'], columns=['Category', 'Number of Items'])
+        st.dataframe(category_counts, hide_index=True, width="stretch")
         st.bar_chart(category_counts.set_index('Category'))
     else:
         st.info("No inventory data to display category distribution.")
@@ -93,7 +74,84 @@ def show_dashboard_page():
     st.markdown("### System Statistics")
     col1, col2 = st.columns(2)
     with col1:
-        st.metric(label="Total Users", value=len(users))
+        st.metric(label="Total Users", value=results['user_count'])
     with col2:
-        st.metric(label="Total Suppliers", value=len(suppliers))
+        st.metric(label="Total Suppliers", value=results['supplier_count'])
+
+    # --- Reports (admins) ---
+    if st.session_state.get('role') == 'admin':
+        st.markdown("---")
+        st.markdown("### Reports")
+        _render_report_section()
+
+@st.fragment
+def _render_low_stock_alert(item, supplier_contacts):
+    """
+    Renders one low stock alert row with its notify button. The row is a fragment, so sending
+    a notification reruns only this row instead of the whole dashboard.
+    """
+    selected_item_id = item['id'] # Use the 'id' field
+    st.warning(f"Item **{item['name']}** is low in stock! Quantity: {item['quantity']}")
+    
+    # Option to notify supplier or admin
+    item_category = item.get('category')
+    if item_category:
+        supplier_emails = supplier_contacts[item_category]['emails']
+        supplier_names = supplier_contacts[item_category]['names']
+
+        if supplier_emails:
+            if st.button(f"Notify Supplier(s) for {item['name']}", key=f"dashboard_notify_supplier_{selected_item_id}"):
+                send_low_stock_notification(item, supplier_emails=supplier_emails, supplier_name=", ".join(supplier_names))
+        else:
+            st.info(f"No supplier with a valid email found for category '{item_category}'.")
+            if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_{selected_item_id}"):
+                send_low_stock_notification(item) # Fallback to admin email
+    else:
+        st.info(f"Item '{item['name']}' has no category. Cannot find specific supplier.")
+        if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_no_category_{selected_item_id}"):
+            send_low_stock_notification(item) # Fallback to admin email
+
+@st.fragment
+def _render_report_section():
+    """Generates the catalog / low stock PDF report; only this section reruns while it is used."""
+    # Imported on first use so the dashboard itself doesn't load the report pipeline
+    from report_service import generate_catalog_report
+
+    col1, col2 = st.columns(2)
+    with col1:
+        report_category = st.selectbox("Category", ["All"] + ITEM_CATEGORIES, key="report_category")
+    with col2:
+        low_stock_only = st.checkbox("Low stock items only", key="report_low_stock")
+
+    if st.button("Generate PDF Report", key="generate_report_btn"):
+        progress_text = st.empty()
+        try:
+            summary = generate_catalog_report(
+                category=None if report_category == "All" else report_category,
+                low_stock=low_stock_only,
+                progress_callback=lambda rendered: progress_text.write(f"{rendered} items rendered...")
+            )
+        except Exception as e:
+            st.error(f"Could not generate the report: {e}")
+            return
+        progress_text.empty()
+        st.session_state.last_report = summary
+
+    summary = st.session_state.get('last_report')
+    if summary and os.path.exists(summary['path']):
+        st.success(f"{summary['filename']}: {summary['items']} items on {summary['pages']} page(s) "
+                   f"({summary['elapsed_seconds']:.1f}s).")
+        report_path = summary['path']
+
+        def read_report():
+            with open(report_path, "rb") as report_file:
+                return report_file.read()
 
+        st.download_button(
+            label="Download Report",
+            data=read_report, # Read only when clicked
+            file_name=summary['filename'],
+            mime="application/pdf",
+            on_click="ignore",
+            key="download_report_btn"
+        )
@@ -0,0 +1,285 @@
+import argparse
+import datetime
+import os
+import socket
+import threading
+import time
+import uuid
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from db_operations import get_mongo_database, get_storage_backend_name, USERNAME_COLLATION
+
+# --- Index Declarations ---
+# Every index the application relies on. Each entry maps directly onto create_index() arguments.
+REQUIRED_INDEXES = {
+    'users': [
+        # Login and registration look users up by username, case-insensitively
+        {'name': 'username_ci_unique', 'keys': [('username', ASCENDING)], 'unique': True, 'collation': USERNAME_COLLATION},
+        # Counting admins (last-admin safeguards)
+        {'name': 'role_1', 'keys': [('role', ASCENDING)]},
+    ],
+    'suppliers': [
+        # Multikey index over the 'categories' array used by find_suppliers_by_category() and get_supplier_contacts_by_category()
+        {'name': 'categories_1', 'keys': [('categories', ASCENDING)]},
+    ],
+    'inventory': [
+        # Category filter sorted by name (inventory page) and per-category reports
+        {'name': 'category_1_name_1', 'keys': [('category', ASCENDING), ('name', ASCENDING)]},
+        # Low-stock lookups (quantity <= threshold)
+        {'name': 'quantity_1', 'keys': [('quantity', ASCENDING)]},
+        # Name sort/search when no category is selected
+        {'name': 'name_1', 'keys': [('name', ASCENDING)]},
+        # Items changed since the previous daily report
+        {'name': 'updated_at_1', 'keys': [('updated_at', ASCENDING)]},
+    ],
+}
+
+# --- Migration Bookkeeping ---
+MIGRATIONS_COLLECTION = 'schema_migrations'
+SCHEMA_DOC_ID = 'schema'
+MIGRATION_LOCK_TTL_SECONDS = 300 # A lock older than this is treated as abandoned (crashed replica)
+STARTUP_MIGRATION_RETRY_SECONDS = 60 # After a failed startup migration, reruns try again at most this often
+
+_startup_migrations_done = False
+_startup_migrations_retry_at = 0.0
+_startup_migrations_lock = threading.Lock()
+
+
+def _index_spec_options(spec):
+    """Returns the create_index() keyword options for an index declaration."""
+    return {k: v for k, v in spec.items() if k not in ('keys',)}
+
+def create_declared_indexes(db, collection_name):
+    """
+    Creates the declared indexes for one collection. create_index() is a no-op when an
+    identical index already exists, so this is safe to run repeatedly.
+    Returns a list of problems (e.g. a conflicting index with the same name or duplicate data).
+    """
+    return _create_indexes(db, collection_name, REQUIRED_INDEXES.get(collection_name, []))
+
+def _create_indexes(db, collection_name, specs):
+    """Creates the given index declarations on one collection. Returns a list of problems."""
+    problems = []
+    collection = db[collection_name]
+    for spec in specs:
+        try:
+            collection.create_index(spec['keys'], **_index_spec_options(spec))
+        except OperationFailure as e:
+            problems.append(f"{collection_name}.{spec['name']}: could not be created ({e})")
+    return problems
+
+def ensure_indexes(db=None):
+    """Idempotently creates every declared index. Returns a list of problems, empty on success."""
+    db = db if db is not None else get_mongo_database()
+    problems = []
+    for collection_name in REQUIRED_INDEXES:
+        problems.extend(create_declared_indexes(db, collection_name))
+    return problems
+
+def _collation_matches(existing, expected):
+    """Compares the options we declare against the (fully expanded) collation the server reports."""
+    if not expected:
+        return not existing
+    if not existing:
+        return False
+    return all(existing.get(key) == value for key, value in expected.items())
+
+def check_index_drift(db=None):
+    """
+    Compares the indexes in the database against REQUIRED_INDEXES.
+    Returns a list of human-readable drift messages: missing indexes, indexes whose keys
+    or options differ from the declaration, and undeclared extra indexes.
+    """
+    db = db if db is not None else get_mongo_database()
+    drift = []
+    for collection_name, specs in REQUIRED_INDEXES.items():
+        existing = db[collection_name].index_information()
+        for spec in specs:
+            info = existing.get(spec['name'])
+            if info is None:
+                drift.append(f"{collection_name}.{spec['name']}: missing")
+                continue
+            if [tuple(k) for k in info['key']] != [tuple(k) for k in spec['keys']]:
+                drift.append(f"{collection_name}.{spec['name']}: keys are {info['key']}, expected {spec['keys']}")
+            if bool(info.get('unique')) != bool(spec.get('unique')):
+                drift.append(f"{collection_name}.{spec['name']}: unique={bool(info.get('unique'))}, expected {bool(spec.get('unique'))}")
+            if not _collation_matches(info.get('collation'), spec.get('collation')):
+                drift.append(f"{collection_name}.{spec['name']}: collation {info.get('collation')} does not match {spec.get('collation')}")
+        declared_names = {spec['name'] for spec in specs} | {'_id_'}
+        for extra_name in sorted(set(existing) - declared_names):
+            drift.append(f"{collection_name}.{extra_name}: not declared in REQUIRED_INDEXES")
+    return drift
+
+
+# --- Versioned Migrations ---
+# Each migration spells out the indexes it creates instead of reading REQUIRED_INDEXES: that
+# declaration describes the current schema and keeps changing, while a migration must do the
+# same thing on a fresh database years from now as it did when it was written.
+def _apply_index_migration(db, indexes_by_collection):
+    problems = []
+    for collection_name, specs in indexes_by_collection.items():
+        problems.extend(_create_indexes(db, collection_name, specs))
+    if problems:
+        raise RuntimeError("; ".join(problems))
+
+def _migration_0001_initial_indexes(db):
+    """Creates the initial users/suppliers/inventory indexes."""
+    _apply_index_migration(db, {
+        'users': [{'name': 'username_ci_unique', 'keys': [('username', ASCENDING)], 'unique': True, 'collation': USERNAME_COLLATION}],
+        'suppliers': [{'name': 'categories_1', 'keys': [('categories', ASCENDING)]}],
+        'inventory': [
+            {'name': 'category_1_name_1', 'keys': [('category', ASCENDING), ('name', ASCENDING)]},
+            {'name': 'quantity_1', 'keys': [('quantity', ASCENDING)]},
+            {'name': 'name_1', 'keys': [('name', ASCENDING)]},
+        ],
+    })
+
+def _migration_0002_users_role_index(db):
+    """Adds the users.role index used by count_admins()."""
+    _apply_index_migration(db, {'users': [{'name': 'role_1', 'keys': [('role', ASCENDING)]}]})
+
+def _migration_0003_inventory_updated_at_index(db):
+    """Adds the inventory.updated_at index used by the incremental daily report."""
+    _apply_index_migration(db, {'inventory': [{'name': 'updated_at_1', 'keys': [('updated_at', ASCENDING)]}]})
+
+# Ordered list of (version, description, function). Append new migrations; never renumber.
+MIGRATIONS = [
+    (1, "Create users/suppliers/inventory indexes", _migration_0001_initial_indexes),
+    (2, "Add users.role index", _migration_0002_users_role_index),
+    (3, "Add inventory.updated_at index", _migration_0003_inventory_updated_at_index),
+]
+
+def get_latest_schema_version():
+    """Returns the schema version the code expects."""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def get_schema_version(db=None):
+    """Returns the schema version currently recorded in the database (0 if never migrated)."""
+    db = db if db is not None else get_mongo_database()
+    schema_doc = db[MIGRATIONS_COLLECTION].find_one({'_id': SCHEMA_DOC_ID})
+    return schema_doc.get('version', 0) if schema_doc else 0
+
+def _acquire_migration_lock(db, owner):
+    """
+    Tries to take the migration lock stored on the schema document.
+    Only one replica can hold it; a lock older than MIGRATION_LOCK_TTL_SECONDS is taken over.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    stale_before = now - datetime.timedelta(seconds=MIGRATION_LOCK_TTL_SECONDS)
+    try:
+        schema_doc = db[MIGRATIONS_COLLECTION].find_one_and_update(
+            {'_id': SCHEMA_DOC_ID, '$or': [{'locked_by': None}, {'locked_at': {'$lt': stale_before}}]},
+            {'$set': {'locked_by': owner, 'locked_at': now}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # The schema document exists and is locked by someone else, so the upsert tried to insert a duplicate
+        return False
+    return schema_doc is not None and schema_doc.get('locked_by') == owner
+
+def _release_migration_lock(db, owner):
+    """Releases the migration lock if we still hold it."""
+    db[MIGRATIONS_COLLECTION].update_one(
+        {'_id': SCHEMA_DOC_ID, 'locked_by': owner},
+        {'$set': {'locked_by': None, 'locked_at': None}}
+    )
+
+def run_migrations(db=None, wait_timeout=60, poll_interval=1.0):
+    """
+    Applies pending migrations in order and returns the resulting schema version.
+    Safe to call from several replicas at once: one takes the lock and migrates,
+    the others wait (up to wait_timeout seconds) for the version to catch up.
+    """
+    db = db if db is not None else get_mongo_database()
+    target_version = get_latest_schema_version()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    deadline = time.monotonic() + wait_timeout
+
+    while True:
+        current_version = get_schema_version(db)
+        if current_version >= target_version:
+            return current_version
+        if _acquire_migration_lock(db, owner):
+            break
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Timed out waiting for another process to migrate the schema to version {target_version}.")
+        time.sleep(poll_interval)
+
+    try:
+        # Re-read under the lock, another replica may have finished just before we took it
+        current_version = get_schema_version(db)
+        for version, description, migration in MIGRATIONS:
+            if version <= current_version:
+                continue
+            print(f"Applying migration {version}: {description}")
+            migration(db)
+            db[MIGRATIONS_COLLECTION].update_one(
+                {'_id': SCHEMA_DOC_ID, 'locked_by': owner},
+                {'$set': {'version': version, 'applied_at': datetime.datetime.now(datetime.timezone.utc)}}
+            )
+            current_version = version
+        return current_version
+    finally:
+        _release_migration_lock(db, owner)
+
+def run_startup_migrations():
+    """
+    Runs migrations once per server process (Streamlit reruns reuse the result).
+    Failures are reported and returned rather than raised, so the app can still start; a failed
+    run is retried on a later rerun (at most every STARTUP_MIGRATION_RETRY_SECONDS).
+    Returns a list of problems, empty when the schema is up to date.
+    """
+    global _startup_migrations_done, _startup_migrations_retry_at
+    if _startup_migrations_done or get_storage_backend_name() != 'mongodb':
+        return [] # Local backends create their own indexes when they open the database
+    with _startup_migrations_lock:
+        if _startup_migrations_done:
+            return []
+        if time.monotonic() < _startup_migrations_retry_at:
+            return ["Schema migration failed; it will be retried shortly."]
+        try:
+            run_migrations()
+        except Exception as e:
+            _startup_migrations_retry_at = time.monotonic() + STARTUP_MIGRATION_RETRY_SECONDS
+            problems = [f"Schema migration failed: {e}"]
+            print(problems[0])
+            return problems
+        _startup_migrations_done = True
+        return []
+
+
+def main(argv=None):
+    """Command line entry point: python db_migrations.py [status|migrate|ensure-indexes|check]"""
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes and schema migrations for the inventory app.")
+    parser.add_argument('command', nargs='?', default='status', choices=['status', 'migrate', 'ensure-indexes', 'check'],
+                        help="status: show versions and drift; migrate: apply pending migrations; "
+                             "ensure-indexes: create declared indexes; check: exit non-zero if indexes drifted")
+    parser.add_argument('--wait-timeout', type=int, default=60, help="Seconds to wait for another process holding the migration lock.")
+    args = parser.parse_args(argv)
+
+    db = get_mongo_database()
+    if args.command == 'migrate':
+        version = run_migrations(db, wait_timeout=args.wait_timeout)
+        print(f"Schema is at version {version}.")
+    elif args.command == 'ensure-indexes':
+        problems = ensure_indexes(db)
+        for problem in problems:
+            print(f"ERROR: {problem}")
+        if problems:
+            return 1
+        print("All declared indexes exist.")
+
+    if args.command in ('status', 'check'):
+        print(f"Schema version: {get_schema_version(db)} (latest: {get_latest_schema_version()})")
+    drift = check_index_drift(db)
+    for message in drift:
+        print(f"DRIFT: {message}")
+    if not drift:
+        print("No index drift detected.")
+    return 1 if (args.command == 'check' and drift) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
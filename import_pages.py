@@ -0,0 +1,60 @@
+import streamlit as st
+import pandas as pd
+
+from import_service import import_inventory_file, import_suppliers_file, SUPPORTED_EXTENSIONS, DEFAULT_BATCH_SIZE
+from pdf_service import enqueue_pending_item_pdfs
+from utils import ITEM_CATEGORIES
+
+def bulk_import_page():
+    """Renders the bulk CSV/Excel import page for inventory items and suppliers."""
+    if st.session_state.role != 'admin':
+        st.error("You do not have permission to access this page.")
+        return
+
+    st.subheader("Bulk Import")
+    import_kind = st.radio("What do you want to import?", ["Inventory Items", "Suppliers"], horizontal=True, key="bulk_import_kind")
+
+    if import_kind == "Inventory Items":
+        st.write("Columns: `name`, `category`, `quantity`, `price` and optionally `image_filename`. "
+                 "Existing items with the same name and category are updated.")
+    else:
+        st.write("Columns: `name`, `email` and optionally `contact_person`, `phone`, `categories` (separated by `;`), `address`. "
+                 "Existing suppliers with the same email are updated.")
+    st.caption(f"Valid categories: {', '.join(ITEM_CATEGORIES)}")
+
+    uploaded_file = st.file_uploader("Upload a CSV or Excel file", type=list(SUPPORTED_EXTENSIONS), key="bulk_import_file")
+    batch_size = st.number_input("Batch size", min_value=100, max_value=10000, value=DEFAULT_BATCH_SIZE, step=100)
+
+    if uploaded_file is not None and st.button("Start Import", key="bulk_import_start"):
+        import_file = import_inventory_file if import_kind == "Inventory Items" else import_suppliers_file
+        progress_text = st.empty()
+        try:
+            summary = import_file(uploaded_file, uploaded_file.name, batch_size=int(batch_size),
+                                  progress_callback=lambda processed: progress_text.write(f"{processed} rows processed..."))
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return
+
+        progress_text.empty()
+        imported_items = summary['inserted'] + summary['updated']
+        if import_kind == "Inventory Items" and imported_items:
+            enqueue_pending_item_pdfs(limit=imported_items) # Render the imported items' PDFs in the background
+        st.success(f"Processed {summary['processed']} rows in {summary['elapsed_seconds']:.1f}s "
+                   f"({summary['rows_per_second']:.0f} rows/s): {summary['inserted']} inserted, {summary['updated']} updated.")
+        if summary['error_count']:
+            st.warning(f"{summary['error_count']} rows were rejected.")
+            errors_df = pd.DataFrame(summary['errors'], columns=['Row', 'Error'])
+            st.dataframe(errors_df, hide_index=True, width="stretch")
+            if summary['error_count'] > len(summary['errors']):
+                st.caption(f"Only the first {len(summary['errors'])} errors are listed.")
+
+    st.markdown("---")
+    st.markdown("#### Deferred PDFs")
+    st.write("Imported items are saved without a PDF and queued for the background PDF workers. "
+             "If the server restarted before they finished, queue the remaining ones here.")
+    if st.button("Queue Pending PDFs", key="bulk_import_generate_pdfs"):
+        queued = enqueue_pending_item_pdfs(limit=1000)
+        if queued:
+            st.success(f"Queued {queued} PDFs for background rendering.")
+        else:
+            st.info("No items are waiting for a PDF (or they are already queued).")
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from page_registry import PAGE_ROUTES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules app.py imports on every cold start, before any page is rendered
+STARTUP_MODULES = ('streamlit', 'db_operations', 'bootstrap', 'theme', 'page_registry')
+
+# Runs in a fresh interpreter so nothing is already cached in sys.modules
+_MEASURE_SCRIPT = """
+import json, sys, time
+try:
+    import resource
+except ImportError:
+    resource = None
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+started = time.perf_counter()
+for name in {startup!r}:
+    __import__(name)
+startup_seconds = time.perf_counter() - started
+startup_rss = max_rss_mb()
+page_started = time.perf_counter()
+for name in {page_modules!r}:
+    __import__(name)
+print(json.dumps({{'startup_seconds': startup_seconds, 'page_seconds': time.perf_counter() - page_started,
+                   'startup_rss_mb': startup_rss, 'total_rss_mb': max_rss_mb(), 'modules': len(sys.modules)}}))
+"""
+
+
+def measure(page_modules=()):
+    """Imports the startup modules, then page_modules, in a new interpreter. Returns the timings and memory."""
+    script = _MEASURE_SCRIPT.format(startup=STARTUP_MODULES, page_modules=tuple(page_modules))
+    result = subprocess.run([sys.executable, '-c', script], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(module_name, top=10):
+    """Uses `python -X importtime` to list the slowest imports (cumulative microseconds) pulled in by one module."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+                            cwd=BASE_DIR, capture_output=True, text=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue # Header line
+        timings.append((int(fields[1].strip()), fields[2].strip()))
+    return sorted(timings, reverse=True)[:top]
+
+def _average(runs, key):
+    values = [run[key] for run in runs if run[key] is not None]
+    return sum(values) / len(values) if values else None
+
+
+def main(argv=None):
+    """Command line entry point: python import_report.py [--repeat N] [--detail MODULE]"""
+    parser = argparse.ArgumentParser(description="Report cold-start import time and memory per page route.")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per measurement (results are averaged).")
+    parser.add_argument('--detail', metavar='MODULE', help="Also list the slowest imports pulled in by this module.")
+    args = parser.parse_args(argv)
+    repeat = max(args.repeat, 1)
+
+    baseline = [measure() for _ in range(repeat)]
+    print(f"Startup imports ({', '.join(STARTUP_MODULES)}): "
+          f"{_average(baseline, 'startup_seconds') * 1000:.0f} ms, "
+          f"{_average(baseline, 'startup_rss_mb') or 0:.0f} MB max RSS")
+    print()
+    print(f"{'Route':<22}{'Module':<18}{'Extra import (ms)':>18}{'Max RSS (MB)':>14}")
+
+    measured_modules = {}
+    for route, (module_name, _) in PAGE_ROUTES.items():
+        if module_name not in measured_modules:
+            measured_modules[module_name] = [measure([module_name]) for _ in range(repeat)]
+        runs = measured_modules[module_name]
+        print(f"{route:<22}{module_name:<18}{_average(runs, 'page_seconds') * 1000:>18.0f}"
+              f"{_average(runs, 'total_rss_mb') or 0:>14.0f}")
+
+    everything = [measure(sorted(measured_modules)) for _ in range(repeat)]
+    print()
+    print(f"All page modules eagerly (previous app.py): +{_average(everything, 'page_seconds') * 1000:.0f} ms, "
+          f"{_average(everything, 'total_rss_mb') or 0:.0f} MB max RSS")
+
+    if args.detail:
+        print()
+        print(f"Slowest imports under {args.detail} (cumulative):")
+        for cumulative_us, package in slowest_imports(args.detail):
+            print(f"  {cumulative_us / 1000:8.1f} ms  {package}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
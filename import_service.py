@@ -0,0 +1,226 @@
+import argparse
+import csv
+import datetime
+import io
+import math
+import os
+import time
+from itertools import islice
+
+from db_operations import bulk_upsert_inventory_items, bulk_upsert_suppliers
+from utils import ITEM_CATEGORIES, is_valid_email
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000 # Further errors are counted but not listed
+
+# Category names are matched case-insensitively and stored with their canonical spelling
+_CATEGORY_LOOKUP = {category.lower(): category for category in ITEM_CATEGORIES}
+
+SUPPORTED_EXTENSIONS = ('csv', 'xlsx')
+
+
+# --- Row Readers ---
+def _normalize_header(header):
+    """Turns a column header like ' Contact Person ' into 'contact_person'."""
+    return str(header or '').strip().lower().replace(' ', '_')
+
+def iter_csv_rows(binary_file):
+    """Yields (row_number, row_dict) from a CSV file object opened in binary mode, one row at a time."""
+    text_file = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text_file)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for row_number, values in enumerate(reader, start=2): # Row 1 is the header
+            if not any(value.strip() for value in values):
+                continue # Skip blank lines
+            yield row_number, dict(zip(headers, values))
+    finally:
+        text_file.detach() # Leave the caller's file object open
+
+def iter_xlsx_rows(binary_file):
+    """Yields (row_number, row_dict) from the first sheet of an .xlsx file using openpyxl's streaming reader."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading .xlsx files requires openpyxl. Install it with `pip install openpyxl` or upload a CSV file.")
+
+    workbook = load_workbook(binary_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None or str(value).strip() == '' for value in values):
+                continue
+            yield row_number, dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+def iter_rows(binary_file, filename):
+    """Picks the CSV or XLSX reader from the file extension."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return iter_csv_rows(binary_file)
+    if extension == 'xlsx':
+        return iter_xlsx_rows(binary_file)
+    raise ValueError(f"Unsupported file type '{extension}'. Please upload one of: {', '.join(SUPPORTED_EXTENSIONS)}.")
+
+
+# --- Row Validation ---
+def _clean(value):
+    """Strips strings and turns None into an empty string."""
+    return '' if value is None else str(value).strip()
+
+def validate_inventory_row(row):
+    """
+    Validates one inventory row. Returns (item_data, None) on success or (None, error_message).
+    Required columns: name, category, quantity, price. Optional: image_filename.
+    """
+    name = _clean(row.get('name'))
+    if not name:
+        return None, "Item name is required."
+
+    category = _CATEGORY_LOOKUP.get(_clean(row.get('category')).lower())
+    if not category:
+        return None, f"Unknown category '{_clean(row.get('category'))}'. Expected one of: {', '.join(ITEM_CATEGORIES)}."
+
+    try:
+        quantity_value = float(_clean(row.get('quantity'))) # Excel stores whole numbers as floats (3.0)
+        if not quantity_value.is_integer():
+            raise ValueError("not a whole number")
+        quantity = int(quantity_value)
+    except (ValueError, OverflowError):
+        return None, f"Quantity '{_clean(row.get('quantity'))}' is not a whole number."
+    if quantity < 0:
+        return None, "Quantity cannot be negative."
+
+    try:
+        price = float(_clean(row.get('price')))
+        if not math.isfinite(price):
+            raise ValueError("not finite")
+    except ValueError:
+        return None, f"Price '{_clean(row.get('price'))}' is not a valid number."
+    if price <= 0:
+        return None, "Price must be greater than zero."
+
+    item_data = {'name': name, 'category': category, 'quantity': quantity, 'price': round(price, 2)}
+    image_filename = _clean(row.get('image_filename'))
+    if image_filename:
+        item_data['image_filename'] = image_filename
+    return item_data, None
+
+def validate_supplier_row(row):
+    """
+    Validates one supplier row. Returns (supplier_data, None) on success or (None, error_message).
+    Required columns: name, email. Optional: contact_person, phone, categories (separated by ';' or ','), address.
+    """
+    name = _clean(row.get('name'))
+    email = _clean(row.get('email'))
+    if not name or not email:
+        return None, "Supplier name and email are required."
+    if not is_valid_email(email):
+        return None, f"'{email}' is not a valid email address."
+
+    categories = []
+    raw_categories = _clean(row.get('categories')).replace(';', ',')
+    for raw_category in filter(None, (c.strip() for c in raw_categories.split(','))):
+        category = _CATEGORY_LOOKUP.get(raw_category.lower())
+        if not category:
+            return None, f"Unknown category '{raw_category}'. Expected one of: {', '.join(ITEM_CATEGORIES)}."
+        if category not in categories:
+            categories.append(category)
+
+    return {
+        'name': name,
+        'contact_person': _clean(row.get('contact_person')),
+        'phone': _clean(row.get('phone')),
+        'email': email,
+        'categories': categories,
+        'address': _clean(row.get('address')),
+        'created_at': datetime.datetime.now().isoformat()
+    }, None
+
+
+# --- Import Pipeline ---
+def _chunked(iterable, size):
+    """Yields lists of up to `size` items without materializing the whole iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _run_import(rows, validate_row, bulk_upsert, batch_size, progress_callback=None):
+    """
+    Validates and upserts rows batch by batch. Only one batch is held in memory at a time.
+    Returns a summary dict with counts, timing and a list of (row_number, error_message).
+    """
+    summary = {'processed': 0, 'inserted': 0, 'updated': 0, 'error_count': 0, 'errors': []}
+
+    def record_error(row_number, message):
+        summary['error_count'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append((row_number, message))
+
+    started = time.perf_counter()
+    for chunk in _chunked(rows, batch_size):
+        valid_docs, valid_row_numbers = [], []
+        for row_number, row in chunk:
+            doc, error = validate_row(row)
+            if error:
+                record_error(row_number, error)
+            else:
+                valid_docs.append(doc)
+                valid_row_numbers.append(row_number)
+
+        inserted, updated, write_errors = bulk_upsert(valid_docs)
+        for index, message in write_errors.items():
+            record_error(valid_row_numbers[index], message)
+
+        summary['processed'] += len(chunk)
+        summary['inserted'] += inserted
+        summary['updated'] += updated
+        if progress_callback:
+            progress_callback(summary['processed'])
+
+    summary['elapsed_seconds'] = time.perf_counter() - started
+    summary['rows_per_second'] = summary['processed'] / summary['elapsed_seconds'] if summary['elapsed_seconds'] else 0.0
+    return summary
+
+def import_inventory_file(binary_file, filename, batch_size=DEFAULT_BATCH_SIZE, progress_callback=None):
+    """
+    Streams a CSV/XLSX file of inventory items into MongoDB, upserting by (name, category).
+    PDF generation is deferred: imported items are marked pdf_status='pending'.
+    """
+    return _run_import(iter_rows(binary_file, filename), validate_inventory_row,
+                       bulk_upsert_inventory_items, batch_size, progress_callback)
+
+def import_suppliers_file(binary_file, filename, batch_size=DEFAULT_BATCH_SIZE, progress_callback=None):
+    """Streams a CSV/XLSX file of suppliers into MongoDB, upserting by email."""
+    return _run_import(iter_rows(binary_file, filename), validate_supplier_row,
+                       bulk_upsert_suppliers, batch_size, progress_callback)
+
+
+def main(argv=None):
+    """Command line entry point: python import_service.py inventory|suppliers <file> [--batch-size N]"""
+    parser = argparse.ArgumentParser(description="Bulk import inventory items or suppliers from a CSV/XLSX file.")
+    parser.add_argument('kind', choices=['inventory', 'suppliers'])
+    parser.add_argument('path')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    import_file = import_inventory_file if args.kind == 'inventory' else import_suppliers_file
+    with open(args.path, 'rb') as binary_file:
+        summary = import_file(binary_file, os.path.basename(args.path), batch_size=args.batch_size,
+                              progress_callback=lambda processed: print(f"{processed} rows processed...", end='\r'))
+
+    print(f"\nProcessed {summary['processed']} rows in {summary['elapsed_seconds']:.1f}s "
+          f"({summary['rows_per_second']:.0f} rows/s): {summary['inserted']} inserted, "
+          f"{summary['updated']} updated, {summary['error_count']} errors.")
+    for row_number, message in summary['errors']:
+        print(f"Row {row_number}: {message}")
+    return 1 if summary['error_count'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
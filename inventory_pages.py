@@ -1,237 +1,73 @@
 import streamlit as st
 import os
 import uuid
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-import re # Import regex for email validation
+import math
+import pandas as pd
 
 # Import MongoDB functions
 from db_operations import (
-    get_all_inventory_items, add_inventory_item, update_inventory_item,
-    delete_inventory_item, find_inventory_item_by_id, find_suppliers_by_category
+    query_inventory_items, add_inventory_item, update_inventory_item, adjust_inventory_quantity,
+    delete_inventory_item, find_inventory_item_by_id, get_supplier_contacts_by_category
 )
 # Import utility functions and constants
-from utils import ITEM_CATEGORIES, get_pdf_dir, get_low_stock_threshold, get_currency_symbol, get_image_dir, get_placeholder_image_path, ALLOWED_EXTENSIONS, allowed_file
+from utils import ITEM_CATEGORIES, get_pdf_dir, get_low_stock_threshold, get_currency_symbol, get_inventory_page_size, get_image_dir, get_placeholder_image_path, get_thumbnail_path, ALLOWED_EXTENSIONS, allowed_file
 from notification_service import send_low_stock_notification
+# PDFs are rendered by background workers
+from pdf_service import enqueue_item_pdf, item_pdf_is_current, item_pdf_download_name, get_item_pdf_bytes
 
-def is_valid_email(email):
-    """Basic regex for email validation."""
-    return re.match(r"[^@]+@[^@]+\.[^@]+", email)
-
-def generate_item_pdf(item_data, item_image_filename=None):
-    """
-    Generates a PDF for a given item, optionally including an image,
-    and saves it to the static/pdfs directory.
-    Returns the filename of the generated PDF.
-
-    Expects item_data to already contain the item's 'id'.
-    """
-    pdf_dir = get_pdf_dir()
-    if not os.path.exists(pdf_dir):
-        os.makedirs(pdf_dir)
-
-    # Ensure 'id' is available before proceeding
-    if 'id' not in item_data or not item_data['id']:
-        raise ValueError("Item data must contain a valid 'id' for PDF generation.")
-
-    # Use the item's 'id' for uniqueness in the filename
-    pdf_filename = f"{item_data['name'].replace(' ', '_').replace('/', '-')}_{item_data['id'][:8]}.pdf"
-    pdf_path = os.path.join(pdf_dir, pdf_filename)
-
-    doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    currency_symbol = get_currency_symbol()
-
-    # Title
-    story.append(Paragraph(f"Inventory Item: {item_data['name']}", styles['h1']))
-    story.append(Spacer(1, 0.2 * inch))
-
-    # Image (if provided and exists)
-    if item_image_filename:
-        images_dir = get_image_dir()
-        image_full_path = os.path.join(images_dir, item_image_filename)
-        if os.path.exists(image_full_path):
-            try:
-                # Add image to PDF, scale to fit width while maintaining aspect ratio
-                img = Image(image_full_path)
-                # Set a max width for the image in PDF (e.g., 4 inches)
-                max_width = 4 * inch
-                aspect_ratio = img.drawHeight / img.drawWidth
-                if img.drawWidth > max_width:
-                    img.drawWidth = max_width
-                    img.drawHeight = max_width * aspect_ratio
-                
-                story.append(img)
-                story.append(Spacer(1, 0.1 * inch)) # Small space after image
-            except Exception as e:
-                print(f"Warning: Could not embed image '{item_image_filename}' into PDF: {e}")
-                story.append(Paragraph(f"<i>(Image could not be embedded: {item_image_filename})</i>", styles['Normal']))
-                story.append(Spacer(1, 0.1 * inch))
-        else:
-            story.append(Paragraph(f"<i>(Image file not found: {item_image_filename})</i>", styles['Normal']))
-            story.append(Spacer(1, 0.1 * inch))
-    else:
-        story.append(Paragraph("<i>(No image provided for this item)</i>", styles['Normal']))
-        story.append(Spacer(1, 0.1 * inch))
-
-    # Details
-    story.append(Paragraph(f"<b>Item ID:</b> {item_data['id']}", styles['Normal']))
-    story.append(Paragraph(f"<b>Category:</b> {item_data.get('category', 'N/A')}", styles['Normal']))
-    story.append(Paragraph(f"<b>Quantity:</b> {item_data['quantity']}", styles['Normal']))
-    story.append(Paragraph(f"<b>Price:</b> {currency_symbol}{item_data['price']:.2f}", styles['Normal']))
-    story.append(Spacer(1, 0.4 * inch))
-
-    story.append(Paragraph("This document provides details for the inventory item.", styles['Normal']))
-
-    doc.build(story)
-    return pdf_filename
-
+# Inventory page view options
+INVENTORY_VIEW_MODES = ["Cards", "Table"]
+CARD_PAGE_SIZE_OPTIONS = [12, 24, 48, 96]
+TABLE_PAGE_SIZE_OPTIONS = [50, 100, 250, 500]
+# Thumbnail widths (pixels) requested for item images; originals are only sent from the full image dialog
+CARD_THUMBNAIL_WIDTH = 512 # A third of a wide layout, sharp on high-DPI screens
+EDIT_THUMBNAIL_WIDTH = 256
 
 def show_inventory_page():
     """Renders the main inventory display with search, filters, quantity controls, and PDF download."""
     st.subheader("Current Inventory")
-    inventory = get_all_inventory_items() # Use MongoDB function
     
-    pdf_dir = get_pdf_dir()
-    images_dir = get_image_dir()
     low_stock_threshold = get_low_stock_threshold()
     currency_symbol = get_currency_symbol()
 
     # Filters and Search
     col1, col2 = st.columns([3,1])
     with col1:
-        search_term = st.text_input("Search by name:", key="inventory_search").lower()
+        search_term = st.text_input("Search by name:", key="inventory_search").strip()
     with col2:
         selected_category = st.selectbox("Filter by category:", ["All"] + ITEM_CATEGORIES, key="category_filter")
 
-    filtered_inventory = [item for item in inventory if search_term in item['name'].lower()]
-    if selected_category != "All":
-        filtered_inventory = [item for item in filtered_inventory if item.get('category') == selected_category]
+    # View options: cards show every control, the compact table fits many more items per page
+    col_view, col_size = st.columns([3,1])
+    with col_view:
+        view_mode = st.radio("View:", INVENTORY_VIEW_MODES, horizontal=True, key="inventory_view_mode")
+    with col_size:
+        size_options = _get_page_size_options(view_mode)
+        default_size = get_inventory_page_size() if view_mode == "Cards" else TABLE_PAGE_SIZE_OPTIONS[0]
+        page_size = st.selectbox("Items per page:", size_options, index=size_options.index(default_size),
+                                 key=f"inventory_page_size_{view_mode.lower()}")
+
+    # Go back to the first page whenever the search, category or page size changes
+    filter_key = (search_term, selected_category, view_mode, page_size)
+    if st.session_state.get('inventory_filter_key') != filter_key:
+        st.session_state.inventory_filter_key = filter_key
+        st.session_state.inventory_page_number = 1
+    page_number = st.session_state.get('inventory_page_number', 1)
+
+    # Only the current page is fetched from MongoDB, together with the total match count.
+    # After a +/- click the cached page is reused with the changed card patched in, instead of refetching.
+    filtered_inventory, total_count = _load_inventory_page(search_term, selected_category, page_number, page_size)
+    total_pages = max(math.ceil(total_count / page_size), 1)
+    if page_number > total_pages: # Items were deleted since the page was chosen
+        page_number = st.session_state.inventory_page_number = total_pages
+        filtered_inventory, total_count = _load_inventory_page(search_term, selected_category, page_number, page_size)
 
     if filtered_inventory:
-        num_columns = 3
-        cols = st.columns(num_columns)
-        
-        col_idx = 0
-        for item in filtered_inventory:
-            with cols[col_idx]:
-                is_low_stock = item['quantity'] <= low_stock_threshold
-                item_display_class = "stCard low-stock-item" if is_low_stock else "stCard"
-                
-                st.markdown(f'<div class="{item_display_class}">', unsafe_allow_html=True)
-                st.markdown(f"**{item['name']}**")
-                
-                # Display item image or placeholder
-                item_image_filename = item.get('image_filename')
-                if item_image_filename:
-                    image_path = os.path.join(images_dir, item_image_filename)
-                    if os.path.exists(image_path):
-                        st.image(image_path, caption=item['name'], use_column_width=True)
-                    else:
-                        st.image(get_placeholder_image_path(), caption="Image not found", use_column_width=True)
-                else:
-                    st.image(get_placeholder_image_path(), caption="No image", use_column_width=True)
-
-                if is_low_stock:
-                    st.markdown('<p class="low-stock-text">LOW STOCK!</p>', unsafe_allow_html=True)
-                    if st.session_state.role == 'admin':
-                        item_category = item.get('category')
-                        if item_category:
-                            relevant_suppliers = find_suppliers_by_category(item_category)
-                            
-                            # Filter for suppliers with valid emails
-                            supplier_emails = [s['email'] for s in relevant_suppliers if s.get('email') and is_valid_email(s['email'])]
-                            supplier_names = [s['name'] for s in relevant_suppliers if s.get('email') and is_valid_email(s['email'])]
-                            
-                            if supplier_emails:
-                                if st.button(f"Notify Supplier(s) for {item['name']}", key=f"dashboard_notify_supplier_{item['id']}"):
-                                    # Pass the list of supplier emails to the notification service
-                                    send_low_stock_notification(item, supplier_emails=supplier_emails, supplier_name=", ".join(supplier_names))
-                                    st.rerun()
-                            else:
-                                st.info(f"No supplier with a valid email found for category '{item_category}'.")
-                                # Fallback to admin notification if no suitable suppliers
-                                if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_{item['id']}"):
-                                    send_low_stock_notification(item) # Fallback to admin email
-                                    st.rerun()
-                        else:
-                            st.info(f"Item '{item['name']}' has no category. Cannot find specific supplier.")
-                            # Fallback to admin notification if no category
-                            if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_{item['id']}"):
-                                send_low_stock_notification(item) # Fallback to admin email
-                                st.rerun()
-
-
-                st.write(f"ID: `{item['id'][:8]}...`")
-                st.write(f"Category: **{item.get('category', 'N/A')}**")
-                st.write(f"Price: **{currency_symbol}{item['price']:.2f}**")
-                
-                current_quantity = item['quantity']
-                col_q1, col_q2, col_q3 = st.columns([1,1.5,1])
-                with col_q1:
-                    if st.button("-", key=f"decrement_{item['id']}", disabled=(current_quantity <= 0)):
-                        if current_quantity > 0:
-                            current_quantity -= 1
-                            update_inventory_item(item['id'], {'quantity': current_quantity})
-                            st.success(f"Quantity for {item['name']} reduced to {current_quantity}.")
-                            st.rerun()
-                with col_q2:
-                    st.write(f"Quantity: **{current_quantity}**")
-                with col_q3:
-                    if st.session_state.role == 'admin':
-                        if st.button("+", key=f"increment_{item['id']}"):
-                            current_quantity += 1
-                            update_inventory_item(item['id'], {'quantity': current_quantity})
-                            st.success(f"Quantity for {item['name']} increased to {current_quantity}.")
-                            st.rerun()
-
-                pdf_filename = item.get('pdf_filename')
-                if pdf_filename:
-                    pdf_path = os.path.join(pdf_dir, pdf_filename)
-                    if os.path.exists(pdf_path):
-                        with open(pdf_path, "rb") as pdf_file:
-                            st.download_button(
-                                label="Download PDF",
-                                data=pdf_file,
-                                file_name=pdf_filename,
-                                mime="application/pdf",
-                                key=f"download_pdf_{item['id']}"
-                            )
-                    else:
-                        st.info("PDF not found (might need to edit & re-save item).")
-                else:
-                    st.info("No PDF available for this item.")
-                
-                if st.session_state.role == 'admin':
-                    if st.button(f"Edit {item['name']}", key=f"edit_btn_{item['id']}"):
-                        st.session_state.current_page = 'edit_item'
-                        st.session_state.edit_item_id = item['id']
-                        st.rerun()
-                    
-                    if st.button(f"Delete {item['name']}", key=f"del_btn_{item['id']}"):
-                        # Use a session state variable for confirmation
-                        if st.session_state.get(f'confirm_delete_item_{item["id"]}', False):
-                            delete_item_from_db(item['id'])
-                            st.success("Item deleted successfully!")
-                            # Reset confirmation state
-                            st.session_state[f'confirm_delete_item_{item["id"]}'] = False
-                            st.rerun()
-                        else:
-                            st.warning(f"Are you sure you want to delete {item['name']}? Click 'Confirm Delete' below to proceed.")
-                            # Set confirmation state
-                            st.session_state[f'confirm_delete_item_{item["id"]}'] = True
-                            # Provide a button to trigger the actual deletion
-                            if st.button("Confirm Delete", key=f"confirm_del_action_btn_{item['id']}"):
-                                delete_item_from_db(item['id'])
-                                st.success("Item deleted successfully!")
-                                st.session_state[f'confirm_delete_item_{item["id"]}'] = False
-                                st.rerun()
-                st.markdown('</div>', unsafe_allow_html=True)
-            col_idx = (col_idx + 1) % num_columns
+        if view_mode == "Table":
+            _render_inventory_table(filtered_inventory, low_stock_threshold, currency_symbol)
+        else:
+            _render_inventory_cards(filtered_inventory, low_stock_threshold, currency_symbol)
+        _render_inventory_pager(page_number, total_pages, total_count, page_size)
     else:
         st.info("No items in inventory matching your search or filters.")
         if st.session_state.role == 'admin':
@@ -239,6 +75,233 @@ def show_inventory_page():
                 st.session_state.current_page = 'add_item'
                 st.rerun()
 
+def _get_page_size_options(view_mode):
+    """Page sizes offered in the selector; the INVENTORY_PAGE_SIZE default is always one of the card options."""
+    if view_mode == "Table":
+        return TABLE_PAGE_SIZE_OPTIONS
+    return sorted(set(CARD_PAGE_SIZE_OPTIONS) | {get_inventory_page_size()})
+
+def _render_inventory_table(items, low_stock_threshold, currency_symbol):
+    """Renders the current page as a single compact table (one element instead of a dozen widgets per item)."""
+    table = pd.DataFrame({
+        'Name': [item['name'] for item in items],
+        'Category': [item.get('category', 'N/A') for item in items],
+        'Price': [item['price'] for item in items],
+        'Quantity': [item['quantity'] for item in items],
+        'Low Stock': [item['quantity'] <= low_stock_threshold for item in items],
+        'PDF': [item.get('pdf_status') or ('ready' if item.get('pdf_filename') else 'none') for item in items],
+        'ID': [item['id'] for item in items],
+    })
+    st.dataframe(
+        table, hide_index=True, width="stretch",
+        column_config={'Price': st.column_config.NumberColumn(format=f"{currency_symbol}%.2f")}
+    )
+    st.caption("Switch to Cards view to change quantities, download PDFs or edit items.")
+
+def _render_inventory_cards(items, low_stock_threshold, currency_symbol):
+    """Renders the current page as a three-column grid of item cards."""
+    images_dir = get_image_dir()
+
+    # Suppliers for the low-stock items on this page, resolved with a single query
+    supplier_contacts = {}
+    if st.session_state.role == 'admin':
+        low_stock_categories = {item.get('category') for item in items if item['quantity'] <= low_stock_threshold}
+        supplier_contacts = get_supplier_contacts_by_category(low_stock_categories)
+
+    num_columns = 3
+    cols = st.columns(num_columns)
+    for index, item in enumerate(items):
+        with cols[index % num_columns]:
+            _render_inventory_card(item, low_stock_threshold, currency_symbol, supplier_contacts, images_dir)
+
+@st.dialog("Item Image", width="large")
+def _show_full_image(image_path, caption):
+    """Shows the original, full-resolution image. Only sent to the browser when the user asks for it."""
+    st.image(image_path, caption=caption, width="stretch")
+
+@st.fragment
+def _render_inventory_card(item, low_stock_threshold, currency_symbol, supplier_contacts, images_dir):
+    """
+    Renders one item card: image, details, quantity controls, PDF download and admin actions.
+    The card is a fragment: clicking +/-, notify or delete reruns and redraws only this card,
+    so interactions cost the same however many items are on the page.
+    """
+    # On fragment reruns the arguments are the ones from the last full run; pick up this card's latest state
+    toast_message = st.session_state.pop(f"inventory_toast_{item['id']}", None)
+    if toast_message:
+        st.toast(toast_message)
+    patches = st.session_state.get('inventory_item_patches', {})
+    if item['id'] in patches:
+        item = patches[item['id']]
+        if item is None:
+            st.info("This item has been deleted.")
+            return
+
+    is_low_stock = item['quantity'] <= low_stock_threshold
+    item_display_class = "stCard low-stock-item" if is_low_stock else "stCard"
+    
+    st.markdown(f'<div class="{item_display_class}">', unsafe_allow_html=True)
+    st.markdown(f"**{item['name']}**")
+    
+    # Display item image or placeholder
+    item_image_filename = item.get('image_filename')
+    if item_image_filename:
+        image_path = os.path.join(images_dir, item_image_filename)
+        thumbnail_path = get_thumbnail_path(image_path, CARD_THUMBNAIL_WIDTH)
+        if thumbnail_path:
+            st.image(thumbnail_path, caption=item['name'], width="stretch")
+            if st.button("View full image", key=f"full_image_{item['id']}"):
+                _show_full_image(image_path, item['name'])
+        else:
+            st.image(get_placeholder_image_path(), caption="Image not found", width="stretch")
+    else:
+        st.image(get_placeholder_image_path(), caption="No image", width="stretch")
+
+    if is_low_stock:
+        st.markdown('<p class="low-stock-text">LOW STOCK!</p>', unsafe_allow_html=True)
+        if st.session_state.role == 'admin':
+            item_category = item.get('category')
+            if item_category:
+                # Only suppliers with valid emails are included in the contacts map.
+                # An item that just dropped below the threshold may not be in the page's map yet.
+                contacts = supplier_contacts.get(item_category) or get_supplier_contacts_by_category({item_category})[item_category]
+                supplier_emails = contacts['emails']
+                supplier_names = contacts['names']
+                
+                # The confirmation from the notification service stays visible; only this card reruns
+                if supplier_emails:
+                    if st.button(f"Notify Supplier(s) for {item['name']}", key=f"dashboard_notify_supplier_{item['id']}"):
+                        # Pass the list of supplier emails to the notification service
+                        send_low_stock_notification(item, supplier_emails=supplier_emails, supplier_name=", ".join(supplier_names))
+                else:
+                    st.info(f"No supplier with a valid email found for category '{item_category}'.")
+                    # Fallback to admin notification if no suitable suppliers
+                    if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_{item['id']}"):
+                        send_low_stock_notification(item) # Fallback to admin email
+            else:
+                st.info(f"Item '{item['name']}' has no category. Cannot find specific supplier.")
+                # Fallback to admin notification if no category
+                if st.button(f"Notify Admin for {item['name']}", key=f"dashboard_notify_admin_{item['id']}"):
+                    send_low_stock_notification(item) # Fallback to admin email
+
+
+    st.write(f"ID: `{item['id'][:8]}...`")
+    st.write(f"Category: **{item.get('category', 'N/A')}**")
+    st.write(f"Price: **{currency_symbol}{item['price']:.2f}**")
+    
+    current_quantity = item['quantity']
+    col_q1, col_q2, col_q3 = st.columns([1,1.5,1])
+    with col_q1:
+        st.button("-", key=f"decrement_{item['id']}", disabled=(current_quantity <= 0),
+                  on_click=_adjust_item_quantity, args=(item['id'], item['name'], -1))
+    with col_q2:
+        st.write(f"Quantity: **{current_quantity}**")
+    with col_q3:
+        if st.session_state.role == 'admin':
+            st.button("+", key=f"increment_{item['id']}",
+                      on_click=_adjust_item_quantity, args=(item['id'], item['name'], 1))
+
+    _render_pdf_download(item)
+    
+    if st.session_state.role == 'admin':
+        if st.button(f"Edit {item['name']}", key=f"edit_btn_{item['id']}"):
+            st.session_state.current_page = 'edit_item'
+            st.session_state.edit_item_id = item['id']
+            st.rerun()
+        
+        # Use a session state variable for confirmation; the callbacks run before this card is redrawn
+        confirm_key = f'confirm_delete_item_{item["id"]}'
+        st.button(f"Delete {item['name']}", key=f"del_btn_{item['id']}",
+                  on_click=_set_delete_confirmation, args=(item['id'], True))
+        if st.session_state.get(confirm_key, False):
+            st.warning(f"Are you sure you want to delete {item['name']}? Click 'Confirm Delete' below to proceed.")
+            col_confirm, col_cancel = st.columns(2)
+            with col_confirm:
+                st.button("Confirm Delete", key=f"confirm_del_action_btn_{item['id']}",
+                          on_click=_delete_item_from_card, args=(item['id'], item['name']))
+            with col_cancel:
+                st.button("Cancel", key=f"cancel_del_action_btn_{item['id']}",
+                          on_click=_set_delete_confirmation, args=(item['id'], False))
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def _render_pdf_download(item):
+    """
+    Renders the PDF download button for an item. The PDF bytes are produced only when the
+    button is clicked (the stored PDF when it matches the card's data, otherwise rendered in
+    memory; both via an LRU byte cache), so a page of cards ships no PDF data.
+    """
+    item_snapshot = dict(item) # The card's data at render time; later edits don't change this button's PDF
+    st.download_button(
+        label="Download PDF",
+        data=lambda: get_item_pdf_bytes(item_snapshot),
+        file_name=item_pdf_download_name(item),
+        mime="application/pdf",
+        on_click="ignore", # Downloading doesn't need to rerun the card
+        key=f"download_pdf_{item['id']}"
+    )
+
+def _load_inventory_page(search_term, selected_category, page_number, page_size):
+    """
+    Returns (items, total_count) for the current inventory page.
+    Normally this queries MongoDB; on the rerun right after a quantity change it reuses the
+    page cached in the session with the updated item documents patched in.
+    """
+    page_key = (search_term, selected_category, page_number, page_size)
+    cached_page = st.session_state.get('inventory_page_cache')
+    patches = st.session_state.pop('inventory_item_patches', None)
+
+    if patches and cached_page and cached_page['key'] == page_key:
+        # A None patch marks an item deleted from its card
+        items = [patches.get(item['id'], item) for item in cached_page['items']]
+        items = [item for item in items if item is not None]
+        total_count = cached_page['total_count'] - (len(cached_page['items']) - len(items))
+    else:
+        items, total_count = query_inventory_items(search_term, selected_category, page_number, page_size)
+
+    st.session_state.inventory_page_cache = {'key': page_key, 'items': items, 'total_count': total_count}
+    return items, total_count
+
+def _adjust_item_quantity(item_id, item_name, delta):
+    """Button callback for +/-: applies an atomic $inc and patches the item so only its card is redrawn."""
+    updated_item = adjust_inventory_quantity(item_id, delta)
+    if updated_item is None:
+        # The item was deleted or another operator already took the last unit: show its current state
+        st.session_state[f"inventory_toast_{item_id}"] = f"Could not change the quantity of {item_name}; it may have been updated by someone else."
+        st.session_state.setdefault('inventory_item_patches', {})[item_id] = find_inventory_item_by_id(item_id)
+        return
+    st.session_state.setdefault('inventory_item_patches', {})[item_id] = updated_item
+    # Callbacks should not draw elements during a fragment rerun, so the card shows the toast itself
+    st.session_state[f"inventory_toast_{item_id}"] = f"Quantity for {updated_item['name']} is now {updated_item['quantity']}."
+
+def _set_delete_confirmation(item_id, pending):
+    """Button callback that shows or hides the delete confirmation on an item card."""
+    st.session_state[f'confirm_delete_item_{item_id}'] = pending
+
+def _delete_item_from_card(item_id, item_name):
+    """Confirm Delete callback: deletes the item and patches it out of the page; its card shows a notice until the next full rerun."""
+    delete_item_from_db(item_id)
+    st.session_state[f'confirm_delete_item_{item_id}'] = False
+    st.session_state.setdefault('inventory_item_patches', {})[item_id] = None
+    st.session_state[f"inventory_toast_{item_id}"] = f"{item_name} deleted successfully!"
+
+def _set_inventory_page(page_number):
+    """Button callback that moves the inventory view to another page."""
+    st.session_state.inventory_page_number = page_number
+
+def _render_inventory_pager(page_number, total_pages, total_count, page_size):
+    """Renders the previous/next controls and the range of items being shown."""
+    first_shown = (page_number - 1) * page_size + 1
+    last_shown = min(page_number * page_size, total_count)
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        st.button("Previous", key="inventory_prev_page", disabled=(page_number <= 1),
+                  on_click=_set_inventory_page, args=(page_number - 1,))
+    with col_info:
+        st.write(f"Showing {first_shown}-{last_shown} of {total_count} items (page {page_number} of {total_pages})")
+    with col_next:
+        st.button("Next", key="inventory_next_page", disabled=(page_number >= total_pages),
+                  on_click=_set_inventory_page, args=(page_number + 1,))
+
 def delete_item_from_db(item_id):
     """Deletes an item from the inventory and its associated PDF/image files."""
     pdf_dir = get_pdf_dir()
@@ -271,7 +334,7 @@ def delete_item_from_db(item_id):
 
 
 def add_item_page():
-    """Renders the form to add a new inventory item and handles its submission, generating a PDF."""
+    """Renders the form to add a new inventory item and handles its submission, queueing its PDF."""
     if st.session_state.role != 'admin':
         st.error("You do not have permission to access this page.")
         return
@@ -297,29 +360,23 @@ def add_item_page():
                     'category': category,
                     'quantity': quantity,
                     'price': price,
-                    'pdf_filename': None, # Initialize as None
+                    'pdf_filename': None, # Set by the PDF worker
+                    'pdf_status': 'pending', # The PDF is rendered in the background
                     'image_filename': item_image_filename # Will be None
                 }
                 
                 try:
                     inserted_id = add_inventory_item(new_item_data)
-                    new_item_data['id'] = inserted_id
-                    
-                    pdf_filename = generate_item_pdf(new_item_data, item_image_filename) # item_image_filename is None
-                    
-                    update_inventory_item(inserted_id, {'pdf_filename': pdf_filename})
-                    
-                    st.success(f"Item '{name}' added successfully and PDF generated: {pdf_filename}!")
-                except ValueError as ve:
-                    st.error(f"Error during PDF generation: {ve}. Item might have been added without PDF.")
+                    enqueue_item_pdf(inserted_id)
+                    st.success(f"Item '{name}' added successfully! Its PDF is being generated.")
                 except Exception as e:
-                    st.error(f"An unexpected error occurred: {e}. Item might have been added without PDF.")
+                    st.error(f"An unexpected error occurred: {e}")
                 
                 st.session_state.current_page = 'inventory'
                 st.rerun()
 
 def edit_item_page():
-    """Renders the form to edit an existing inventory item and handles its submission, regenerating a PDF."""
+    """Renders the form to edit an existing inventory item and handles its submission, queueing a new PDF."""
     if st.session_state.role != 'admin':
         st.error("You do not have permission to access this page.")
         return
@@ -362,9 +419,10 @@ def edit_item_page():
         images_dir = get_image_dir()
 
         if current_image_filename:
-            image_path = os.os.path.join(images_dir, current_image_filename)
-            if os.path.exists(image_path):
-                st.image(image_path, caption="Current Image", width=150)
+            image_path = os.path.join(images_dir, current_image_filename)
+            thumbnail_path = get_thumbnail_path(image_path, EDIT_THUMBNAIL_WIDTH)
+            if thumbnail_path:
+                st.image(thumbnail_path, caption="Current Image", width=150)
                 st.write(f"Filename: `{current_image_filename}`")
             else:
                 st.info("Current image file not found.")
@@ -381,9 +439,6 @@ def edit_item_page():
             if not name:
                 st.error('Item Name is required.')
             else:
-                old_pdf_filename = item_to_edit.get('pdf_filename')
-                # No longer need old_image_filename for deletion upon new upload
-
                 updates = {
                     'name': name,
                     'category': category,
@@ -394,29 +449,14 @@ def edit_item_page():
                 # No new image upload to handle, retain existing image_filename
                 updates['image_filename'] = item_to_edit.get('image_filename')
 
-                # Update the item_to_edit dictionary with new values for PDF generation
-                item_to_edit.update(updates)
-                
-                try:
-                    new_pdf_filename = generate_item_pdf(item_to_edit, item_to_edit['image_filename'])
-                    updates['pdf_filename'] = new_pdf_filename
-                    st.success(f"PDF regenerated: {new_pdf_filename}")
-
-                    old_pdf_filename = item_to_edit.get('pdf_filename')
-                    if old_pdf_filename and old_pdf_filename != new_pdf_filename:
-                        old_pdf_path = os.path.join(get_pdf_dir(), old_pdf_filename)
-                        if os.path.exists(old_pdf_path):
-                            try:
-                                os.remove(old_pdf_path)
-                                st.info(f"Old PDF '{old_pdf_filename}' deleted.")
-                            except OSError as e:
-                                st.error(f"Error deleting old PDF file: {e}")
-
-                except Exception as e:
-                    st.error(f"Error regenerating PDF: {e}. Item updated, but PDF might be outdated.")
-                    updates['pdf_filename'] = item_to_edit.get('pdf_filename')
+                # The PDF is keyed by a hash of its printed fields: only queue a render when one of them changed
+                needs_pdf = not item_pdf_is_current(dict(item_to_edit, **updates))
+                if needs_pdf:
+                    updates['pdf_status'] = 'pending'
 
                 update_inventory_item(item_id, updates) # Use MongoDB function
+                if needs_pdf:
+                    enqueue_item_pdf(item_id) # Saving again while a render is queued or running coalesces into one render
                 st.success('Item updated successfully!')
                 st.session_state.current_page = 'inventory'
                 st.rerun()
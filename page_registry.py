@@ -0,0 +1,33 @@
+import importlib
+
+# --- Page Registry ---
+# Maps each route (st.session_state.current_page) to the module and function that render it.
+# A page's module is imported the first time its route is visited, so a session sitting on
+# the login page never loads ReportLab, pandas, the email modules or the admin pages.
+# importlib keeps imported modules in sys.modules, so later visits cost a dict lookup.
+PAGE_ROUTES = {
+    'login': ('auth', 'login_page'),
+    'register': ('auth', 'register_page'),
+    'dashboard': ('dashboard_pages', 'show_dashboard_page'),
+    'inventory': ('inventory_pages', 'show_inventory_page'),
+    'add_item': ('inventory_pages', 'add_item_page'),
+    'edit_item': ('inventory_pages', 'edit_item_page'),
+    'admin_dashboard': ('admin_pages', 'admin_dashboard_page'),
+    'manage_users': ('admin_pages', 'manage_users_page'),
+    'edit_user': ('admin_pages', 'edit_user_page'),
+    'supplier_management': ('supplier_pages', 'show_supplier_management_page'),
+    'bulk_import': ('import_pages', 'bulk_import_page'),
+}
+
+DEFAULT_ROUTE = 'login'
+
+
+def get_page_function(route):
+    """Imports (on first use) and returns the render function for a route; unknown routes fall back to the login page."""
+    module_name, function_name = PAGE_ROUTES.get(route, PAGE_ROUTES[DEFAULT_ROUTE])
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)
+
+def render_page(route):
+    """Renders the page registered for a route."""
+    get_page_function(route)()
@@ -0,0 +1,477 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+
+from db_operations import (
+    find_inventory_item_by_id, set_inventory_pdf_state, find_inventory_items_pending_pdf, iter_inventory_items, invalidate_cache
+)
+from utils import get_pdf_dir, get_image_dir, get_currency_symbol
+
+# --- Content-Addressed Item PDFs ---
+# An item's PDF is named after a hash of everything printed in it (id, name, category, quantity,
+# price, image and currency symbol), so the filename changes exactly when the printed content
+# does. If the item's stored pdf_filename already matches and the file exists, the PDF is
+# current and nothing is rendered. Files no item references any more are removed by a
+# background sweep (see collect_stale_pdfs). Bump PDF_LAYOUT_VERSION when the layout of
+# generate_item_pdf changes so every item gets a new file.
+PDF_LAYOUT_VERSION = 1
+PDF_GC_GRACE_SECONDS = 120 # Unreferenced files younger than this are kept (a save may be in flight)
+_ITEM_PDF_PATTERN = re.compile(r'^item-[0-9a-f]{24}\.pdf$')
+
+def item_pdf_content_hash(item_data, item_image_filename=None):
+    """Hex digest of the fields generate_item_pdf prints for an item."""
+    image_stamp = None
+    if item_image_filename:
+        # A replaced image file under the same name must produce a new PDF too
+        try:
+            stat = os.stat(os.path.join(get_image_dir(), item_image_filename))
+            image_stamp = [stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            image_stamp = 'missing'
+    printed = [
+        PDF_LAYOUT_VERSION,
+        item_data['id'],
+        item_data['name'],
+        item_data.get('category', 'N/A'),
+        item_data['quantity'],
+        f"{item_data['price']:.2f}", # Prices that print the same hash the same
+        item_image_filename,
+        image_stamp,
+        get_currency_symbol()
+    ]
+    return hashlib.sha256(json.dumps(printed, default=str).encode('utf-8')).hexdigest()
+
+def item_pdf_filename(item_data, item_image_filename=None):
+    """The content-addressed filename the item's PDF is stored under."""
+    return f"item-{item_pdf_content_hash(item_data, item_image_filename)[:24]}.pdf"
+
+def item_pdf_download_name(item_data):
+    """Readable filename offered to the browser when downloading an item's PDF."""
+    return f"{item_data['name'].replace(' ', '_').replace('/', '-')}_{item_data['id'][:8]}.pdf"
+
+def item_pdf_is_current(item_data):
+    """True when the item's stored PDF already shows its current content (no render needed)."""
+    pdf_filename = item_data.get('pdf_filename')
+    if not pdf_filename or item_data.get('pdf_status') in ('pending', 'failed'):
+        return False
+    if pdf_filename != item_pdf_filename(item_data, item_data.get('image_filename')):
+        return False
+    return os.path.exists(os.path.join(get_pdf_dir(), pdf_filename))
+
+
+# --- Item PDF Rendering ---
+def generate_item_pdf(item_data, item_image_filename=None):
+    """
+    Generates a PDF for a given item, optionally including an image,
+    and saves it to the static/pdfs directory under its content-addressed name.
+    Returns the filename of the generated PDF.
+
+    Expects item_data to already contain the item's 'id'.
+    """
+    pdf_dir = get_pdf_dir()
+    if not os.path.exists(pdf_dir):
+        os.makedirs(pdf_dir)
+
+    # Ensure 'id' is available before proceeding
+    if 'id' not in item_data or not item_data['id']:
+        raise ValueError("Item data must contain a valid 'id' for PDF generation.")
+
+    pdf_filename = item_pdf_filename(item_data, item_image_filename)
+    pdf_path = os.path.join(pdf_dir, pdf_filename)
+    # Build into a temporary file and move it into place, so a half-written PDF is never served
+    temp_path = f"{pdf_path}.{threading.get_ident()}.tmp"
+    try:
+        _build_item_pdf(temp_path, item_data, item_image_filename)
+        os.replace(temp_path, pdf_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return pdf_filename
+
+def render_item_pdf_bytes(item_data, item_image_filename=None):
+    """Renders an item's PDF in memory and returns its bytes (nothing is written to disk)."""
+    if 'id' not in item_data or not item_data['id']:
+        raise ValueError("Item data must contain a valid 'id' for PDF generation.")
+    buffer = io.BytesIO()
+    _build_item_pdf(buffer, item_data, item_image_filename)
+    return buffer.getvalue()
+
+def _build_item_pdf(target, item_data, item_image_filename):
+    """Lays out an item's PDF into target (a file path or a binary file-like object)."""
+    doc = SimpleDocTemplate(target, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    currency_symbol = get_currency_symbol()
+
+    # Title
+    story.append(Paragraph(f"Inventory Item: {item_data['name']}", styles['h1']))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # Image (if provided and exists)
+    if item_image_filename:
+        images_dir = get_image_dir()
+        image_full_path = os.path.join(images_dir, item_image_filename)
+        if os.path.exists(image_full_path):
+            try:
+                # Add image to PDF, scale to fit width while maintaining aspect ratio
+                img = Image(image_full_path)
+                # Set a max width for the image in PDF (e.g., 4 inches)
+                max_width = 4 * inch
+                aspect_ratio = img.drawHeight / img.drawWidth
+                if img.drawWidth > max_width:
+                    img.drawWidth = max_width
+                    img.drawHeight = max_width * aspect_ratio
+
+                story.append(img)
+                story.append(Spacer(1, 0.1 * inch)) # Small space after image
+            except Exception as e:
+                print(f"Warning: Could not embed image '{item_image_filename}' into PDF: {e}")
+                story.append(Paragraph(f"<i>(Image could not be embedded: {item_image_filename})</i>", styles['Normal']))
+                story.append(Spacer(1, 0.1 * inch))
+        else:
+            story.append(Paragraph(f"<i>(Image file not found: {item_image_filename})</i>", styles['Normal']))
+            story.append(Spacer(1, 0.1 * inch))
+    else:
+        story.append(Paragraph("<i>(No image provided for this item)</i>", styles['Normal']))
+        story.append(Spacer(1, 0.1 * inch))
+
+    # Details
+    story.append(Paragraph(f"<b>Item ID:</b> {item_data['id']}", styles['Normal']))
+    story.append(Paragraph(f"<b>Category:</b> {item_data.get('category', 'N/A')}", styles['Normal']))
+    story.append(Paragraph(f"<b>Quantity:</b> {item_data['quantity']}", styles['Normal']))
+    story.append(Paragraph(f"<b>Price:</b> {currency_symbol}{item_data['price']:.2f}", styles['Normal']))
+    story.append(Spacer(1, 0.4 * inch))
+
+    story.append(Paragraph("This document provides details for the inventory item.", styles['Normal']))
+
+    doc.build(story)
+
+def collect_stale_pdfs(min_age_seconds=PDF_GC_GRACE_SECONDS):
+    """
+    Removes content-addressed item PDFs that no inventory item references any more.
+    References are counted from the database, so this is safe to run from any replica.
+    Returns the number of files removed.
+    """
+    pdf_dir = get_pdf_dir()
+    if not os.path.isdir(pdf_dir):
+        return 0
+    reference_counts = {}
+    for item in iter_inventory_items(projection=['pdf_filename']):
+        pdf_filename = item.get('pdf_filename')
+        if pdf_filename:
+            reference_counts[pdf_filename] = reference_counts.get(pdf_filename, 0) + 1
+
+    removed = 0
+    cutoff = time.time() - min_age_seconds
+    for pdf_filename in os.listdir(pdf_dir):
+        # Only item PDFs are managed here; reports are swept by report_service.collect_old_reports
+        if not _ITEM_PDF_PATTERN.match(pdf_filename) or reference_counts.get(pdf_filename, 0) > 0:
+            continue
+        pdf_path = os.path.join(pdf_dir, pdf_filename)
+        try:
+            if os.path.getmtime(pdf_path) < cutoff:
+                os.remove(pdf_path)
+                removed += 1
+        except OSError as e:
+            print(f"Warning: Could not delete stale PDF '{pdf_filename}': {e}")
+    return removed
+
+# --- In-Memory PDF Bytes for Downloads ---
+# Download buttons produce their bytes only when clicked, from the item data the card shows.
+# When the background workers have already stored the PDF for exactly that content, the file
+# is served; otherwise (save still pending, render failed, file swept) the PDF is rendered in
+# memory. Either way the bytes are kept in a process-wide LRU cache bounded by total size.
+# Keys are content hashes, so an edit simply produces a new key and no invalidation is needed;
+# entries for old versions age out.
+class _PdfBytesCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # content hash -> PDF bytes
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, renderer):
+        """Returns the cached bytes for key, calling renderer() on a miss."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+
+        # Render outside the lock so one slow render doesn't block other downloads
+        data = renderer()
+        if len(data) > self.max_bytes:
+            return data # Larger than the whole cache; don't evict everything for it
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = data
+                self._total_bytes += len(data)
+            self._entries.move_to_end(key)
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+        return data
+
+    def clear(self):
+        """Drops every cached PDF."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+def _get_pdf_byte_cache_size():
+    try:
+        return max(int(os.getenv("PDF_BYTE_CACHE_MB", "32")), 0) * 1024 * 1024
+    except ValueError:
+        return 32 * 1024 * 1024
+
+_pdf_bytes_cache = _PdfBytesCache(max_bytes=_get_pdf_byte_cache_size())
+
+def _read_stored_item_pdf(item_data):
+    """Returns the bytes of the item's stored PDF if it shows the given content, else None."""
+    if not item_pdf_is_current(item_data):
+        return None
+    try:
+        with open(os.path.join(get_pdf_dir(), item_data['pdf_filename']), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None # Removed by the sweep between the check and the read
+
+def get_item_pdf_bytes(item_data):
+    """Returns the PDF bytes for an item's data: its stored PDF when current, otherwise rendered in memory."""
+    item_image_filename = item_data.get('image_filename')
+    key = item_pdf_content_hash(item_data, item_image_filename)
+    return _pdf_bytes_cache.get_or_render(
+        key, lambda: _read_stored_item_pdf(item_data) or render_item_pdf_bytes(item_data, item_image_filename)
+    )
+
+
+# --- Background Rendering Service ---
+# Saving an item only marks it pdf_status='pending' and queues its id; worker threads render
+# the PDF and set pdf_status to 'ready' (with pdf_filename) or 'failed'. Workers always load
+# the item's current document, and repeated saves coalesce: an id already waiting in the queue
+# is not queued twice, and an id saved again while it is being rendered is rendered once more
+# afterwards instead of storing the superseded result. Only the latest version is recorded.
+# Renders whose content-addressed file already exists only update the item (no ReportLab work).
+def get_pdf_worker_count():
+    """Number of background PDF rendering threads per process (PDF_WORKERS, default 2)."""
+    try:
+        return max(int(os.getenv("PDF_WORKERS", "2")), 1)
+    except ValueError:
+        return 2
+
+def get_pdf_gc_interval():
+    """Seconds between background sweeps for unreferenced item PDFs (PDF_GC_INTERVAL_SECONDS, default 600; 0 disables)."""
+    try:
+        return max(int(os.getenv("PDF_GC_INTERVAL_SECONDS", "600")), 0)
+    except ValueError:
+        return 600
+
+
+class PdfRenderService:
+    """Job queue plus worker threads that render item PDFs in the background."""
+
+    def __init__(self, workers=2, gc_interval_seconds=0):
+        self.workers = workers
+        self.gc_interval_seconds = gc_interval_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._queued = set() # Item ids waiting in the queue
+        self._rendering = set() # Item ids a worker is rendering right now
+        self._dirty = set() # Item ids saved again while being rendered
+        self._status_written = False # PDF states recorded since the inventory cache was last invalidated
+        self._threads = []
+        self.stats = {'rendered': 0, 'reused': 0, 'failed': 0, 'coalesced': 0, 'collected': 0}
+
+    def start(self):
+        """Starts the worker threads and the stale file sweep (daemon threads, so they never block shutdown)."""
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"pdf-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.gc_interval_seconds:
+            thread = threading.Thread(target=self._sweep, args=(self.gc_interval_seconds,), name="pdf-sweep", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def enqueue(self, item_id):
+        """Queues an item for rendering. Returns False when the request was merged into one already pending."""
+        with self._lock:
+            if item_id in self._queued:
+                self.stats['coalesced'] += 1
+                return False
+            if item_id in self._rendering:
+                self._dirty.add(item_id)
+                self.stats['coalesced'] += 1
+                return False
+            self._queued.add(item_id)
+        self._queue.put(item_id)
+        return True
+
+    def is_queued(self, item_id):
+        """True while the item is waiting for or going through rendering in this process."""
+        with self._lock:
+            return item_id in self._queued or item_id in self._rendering
+
+    def wait_until_idle(self):
+        """Blocks until every queued job has been processed (used by the command line and scripts)."""
+        self._queue.join()
+
+    def _is_superseded(self, item_id):
+        with self._lock:
+            return item_id in self._dirty
+
+    def _work(self):
+        while True:
+            item_id = self._queue.get()
+            with self._lock:
+                self._queued.discard(item_id)
+                self._rendering.add(item_id)
+            try:
+                self._render(item_id)
+            except Exception as e:
+                print(f"Warning: PDF worker failed for item {item_id}: {e}")
+            finally:
+                with self._lock:
+                    self._rendering.discard(item_id)
+                    render_again = item_id in self._dirty
+                    self._dirty.discard(item_id)
+                if render_again:
+                    self.enqueue(item_id)
+                self._invalidate_if_drained()
+                self._queue.task_done()
+
+    def _mark_status_written(self):
+        with self._lock:
+            self._status_written = True
+
+    def _invalidate_if_drained(self):
+        """
+        Invalidates the inventory read cache once per drained queue instead of once per render,
+        so a long render queue doesn't keep every replica's inventory cache cold. Until then,
+        cached pages may show an older pdf_status; downloads then render in memory.
+        """
+        with self._lock:
+            if not self._status_written or self._queued or self._rendering:
+                return
+            self._status_written = False
+        invalidate_cache('inventory')
+
+    def _render(self, item_id):
+        item = find_inventory_item_by_id(item_id)
+        if item is None:
+            return # Deleted while waiting
+        item_image_filename = item.get('image_filename')
+        pdf_filename = item_pdf_filename(item, item_image_filename)
+        # Same printed content as an existing file (e.g. an edit that changed nothing printed): reuse it
+        pdf_path = os.path.join(get_pdf_dir(), pdf_filename)
+        reused = os.path.exists(pdf_path)
+        if reused:
+            try:
+                os.utime(pdf_path) # Restart the sweep's grace period while the reference is written
+            except OSError:
+                reused = False # Swept in the meantime; render it again
+        if not reused:
+            try:
+                generate_item_pdf(item, item_image_filename)
+            except Exception as e:
+                print(f"Warning: Could not generate PDF for item {item_id}: {e}")
+                if not self._is_superseded(item_id):
+                    set_inventory_pdf_state(item_id, 'failed')
+                    self._mark_status_written()
+                with self._lock:
+                    self.stats['failed'] += 1
+                return
+
+        if self._is_superseded(item_id):
+            return # A newer save is queued; its render will be the one recorded (the sweep removes this file)
+        set_inventory_pdf_state(item_id, 'ready', pdf_filename)
+        self._mark_status_written()
+        with self._lock:
+            self.stats['reused' if reused else 'rendered'] += 1
+
+        # Files from before content addressing are not covered by the sweep; remove them once replaced
+        old_pdf_filename = item.get('pdf_filename')
+        if old_pdf_filename and old_pdf_filename != pdf_filename and not _ITEM_PDF_PATTERN.match(old_pdf_filename):
+            _remove_pdf(old_pdf_filename)
+
+    def _sweep(self, interval_seconds):
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                removed = collect_stale_pdfs()
+                # Imported here: report_service is only loaded once the first sweep runs
+                from report_service import collect_old_reports
+                removed += collect_old_reports()
+                with self._lock:
+                    self.stats['collected'] += removed
+            except Exception as e:
+                print(f"Warning: Stale PDF sweep failed: {e}")
+
+
+def _remove_pdf(pdf_filename):
+    pdf_path = os.path.join(get_pdf_dir(), pdf_filename)
+    try:
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+    except OSError as e:
+        print(f"Warning: Could not delete PDF '{pdf_filename}': {e}")
+
+
+_pdf_service = None
+_pdf_service_lock = threading.Lock()
+
+def get_pdf_service():
+    """Returns this process's PDF rendering service, starting its workers on first use."""
+    global _pdf_service
+    if _pdf_service is None:
+        with _pdf_service_lock:
+            if _pdf_service is None:
+                service = PdfRenderService(workers=get_pdf_worker_count(), gc_interval_seconds=get_pdf_gc_interval())
+                service.start()
+                _pdf_service = service
+    return _pdf_service
+
+def enqueue_item_pdf(item_id):
+    """Queues a background render for an item whose pdf_status was set to 'pending'."""
+    return get_pdf_service().enqueue(item_id)
+
+def enqueue_pending_item_pdfs(limit=500):
+    """Queues up to `limit` items that are still marked pdf_status='pending' (e.g. after a bulk import or restart). Returns how many were queued."""
+    if limit <= 0:
+        return 0 # MongoDB's limit(0) means "no limit"
+    service = get_pdf_service()
+    return sum(1 for item in find_inventory_items_pending_pdf(limit) if service.enqueue(item['id']))
+
+
+def main(argv=None):
+    """Command line entry point: python pdf_service.py [--limit N] [--collect] renders pending item PDFs in the foreground."""
+    parser = argparse.ArgumentParser(description="Render the PDFs of inventory items marked pdf_status='pending'.")
+    parser.add_argument('--limit', type=int, default=1000, help="Maximum number of items to render in this run.")
+    parser.add_argument('--collect', action='store_true', help="Afterwards, remove item PDFs no item references any more.")
+    args = parser.parse_args(argv)
+
+    queued = enqueue_pending_item_pdfs(args.limit)
+    print(f"Rendering {queued} PDFs with {get_pdf_worker_count()} workers...")
+    service = get_pdf_service()
+    service.wait_until_idle()
+    print(f"Done: {service.stats['rendered']} rendered, {service.stats['reused']} reused, {service.stats['failed']} failed.")
+    if args.collect:
+        print(f"Removed {collect_stale_pdfs()} unreferenced PDFs.")
+    return 1 if service.stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,112 @@
+# --- Compact Record Types ---
+# List queries can return thousands of documents that then live in the process-wide cache.
+# A decoded BSON dict per item (plus a duplicated string 'id') costs several hundred bytes;
+# these __slots__ records keep only the projected fields and the ObjectId, and build the
+# string 'id' on first access. They support the dict-style read access the pages already use
+# (record['name'], record.get('category'), 'id' in record, record.copy()), so they can be
+# passed anywhere an item/supplier/user dict was read.
+# Records are shared between sessions through the read cache, so they are immutable: item
+# assignment and attribute writes raise TypeError, and list values are stored as tuples.
+# record.copy() returns a mutable dict for code that needs to change a document.
+
+_MISSING = object()
+
+
+class Record:
+    """Base class for slotted, dict-compatible document records."""
+
+    __slots__ = ('_oid', '_id_str')
+    FIELDS = ()
+
+    def __init__(self, doc):
+        # Only the declared fields are kept, so documents from local backends (which are not
+        # projected server-side) end up the same size as projected MongoDB results.
+        object.__setattr__(self, '_oid', doc.get('_id'))
+        object.__setattr__(self, '_id_str', None)
+        for field in self.FIELDS:
+            value = doc.get(field, _MISSING)
+            if value is not _MISSING:
+                object.__setattr__(self, field, tuple(value) if isinstance(value, list) else value)
+
+    def __setattr__(self, name, value):
+        raise TypeError(f"{type(self).__name__} is read-only; use record.copy() to get a mutable dict.")
+
+    __delattr__ = __setattr__
+
+    @classmethod
+    def from_document(cls, doc):
+        """Builds a record from a document; records are returned unchanged."""
+        return doc if isinstance(doc, cls) else cls(doc)
+
+    @classmethod
+    def projection(cls):
+        """MongoDB projection that loads only the fields this record type stores."""
+        return {field: 1 for field in cls.FIELDS}
+
+    # Dict-style access
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if key == 'id':
+            if self._id_str is None and self._oid is not None:
+                object.__setattr__(self, '_id_str', str(self._oid)) # Converted lazily, only when a page asks for it
+            return self._id_str if self._id_str is not None else default
+        if key == '_id':
+            return self._oid if self._oid is not None else default
+        if key in self.FIELDS:
+            return getattr(self, key, default)
+        return default
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        present = [field for field in self.FIELDS if hasattr(self, field)]
+        identity = ['_id', 'id'] if self._oid is not None else []
+        return present + identity
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Returns a plain (mutable) dict copy of the record, including '_id' and the string 'id'."""
+        return {key: list(value) if isinstance(value, tuple) else value for key, value in self.items()}
+
+    copy = to_dict # s.copy() on a record gives a mutable dict, like it did for documents
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class InventoryRecord(Record):
+    FIELDS = ('name', 'category', 'quantity', 'price', 'pdf_filename', 'image_filename', 'pdf_status')
+    __slots__ = FIELDS
+
+
+class SupplierRecord(Record):
+    FIELDS = ('name', 'contact_person', 'phone', 'email', 'categories', 'address', 'created_at')
+    __slots__ = FIELDS
+
+
+class UserRecord(Record):
+    # Password hashes are deliberately not part of list results; use find_user_by_* for authentication
+    FIELDS = ('username', 'role')
+    __slots__ = FIELDS
+
+
+def to_records(record_type, result):
+    """Converts a list of documents (or an (items, total_count) tuple) into records of the given type."""
+    if isinstance(result, tuple):
+        items, *rest = result
+        return (to_records(record_type, items), *rest)
+    return [record_type.from_document(doc) for doc in result]
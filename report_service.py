@@ -0,0 +1,383 @@
+import argparse
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfgen import canvas
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, NumberObject
+
+from utils import get_pdf_dir, get_currency_symbol, get_low_stock_threshold
+
+# --- Catalog / Stock Reports ---
+# A report is built in three stages:
+#   1. Items are read from the database in batches (iter_inventory_items), sorted by category and name.
+#   2. Every CHUNK of rows becomes a job for a process pool; each worker draws its pages with
+#      ReportLab into its own temporary PDF. Only a few chunks per worker are in flight at once,
+#      so the parent never holds more than that many rows.
+#   3. As chunks finish (in order), their objects are copied straight into the output file by
+#      _StreamingPdfMerger and the chunk file is deleted.
+# All three stages use bounded memory: besides the rows and pages of the chunks in flight, the
+# merge only keeps a file offset and a page reference per page (a few dozen bytes each).
+# Pages have a fixed number of rows, so every chunk knows its page numbers up front and the
+# chunks can be rendered independently.
+ROWS_PER_PAGE = 40
+DEFAULT_CHUNK_PAGES = 25 # 1,000 rows per chunk
+REPORT_BATCH_SIZE = 2000 # Items fetched from the database per round trip
+REPORT_FIELDS = ('name', 'category', 'quantity', 'price')
+REPORT_RETENTION_HOURS = 24 # Generated reports older than this are removed (see collect_old_reports)
+# Timestamped files written by generate_catalog_report; other PDFs in static/pdfs are not touched
+_REPORT_FILE_PATTERN = re.compile(r'^(Catalog_Report|Low_Stock_Report)(_.+)?_\d{4}-\d{2}-\d{2}_\d{6}\.pdf$')
+# Page attributes a page may inherit from its page tree node; copied onto each page as the tree is rebuilt
+_INHERITED_PAGE_KEYS = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+# Column layout (x position in points, header, alignment)
+_COLUMNS = (
+    (0.6 * inch, "ID", 'left'),
+    (1.4 * inch, "Name", 'left'),
+    (4.2 * inch, "Category", 'left'),
+    (5.9 * inch, "Qty", 'right'),
+    (6.8 * inch, "Price", 'right'),
+    (7.9 * inch, "Value", 'right'),
+)
+_MAX_NAME_CHARS = 42
+
+
+def get_report_worker_count():
+    """Number of processes that render report chunks (REPORT_WORKERS, default: CPU count)."""
+    try:
+        return max(int(os.getenv("REPORT_WORKERS", str(os.cpu_count() or 1))), 1)
+    except ValueError:
+        return os.cpu_count() or 1
+
+def iter_report_rows(category=None, low_stock=False, batch_size=REPORT_BATCH_SIZE):
+    """Streams (short_id, name, category, quantity, price) rows for a report, sorted by category and name."""
+    # Imported here so the chunk worker processes don't need the database modules
+    from db_operations import iter_inventory_items
+    max_quantity = get_low_stock_threshold() if low_stock else None
+    for item in iter_inventory_items(batch_size=batch_size, projection=REPORT_FIELDS,
+                                     sort=[('category', 1), ('name', 1)],
+                                     category=category, max_quantity=max_quantity):
+        yield (item['id'][:8], item.get('name', ''), item.get('category') or 'N/A',
+               item.get('quantity', 0), float(item.get('price', 0.0)))
+
+def _batched(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _render_chunk(job):
+    """Process pool worker: draws one chunk of rows into its own PDF. Returns (chunk_index, path, page_count)."""
+    chunk_index, first_page_number, rows, header, temp_dir = job
+    title, subtitle, currency_symbol, low_stock_threshold = header
+    path = os.path.join(temp_dir, f"chunk-{chunk_index:06d}.pdf")
+    pdf = canvas.Canvas(path, pagesize=letter)
+    page_width, page_height = letter
+
+    page_rows = [rows[start:start + ROWS_PER_PAGE] for start in range(0, len(rows), ROWS_PER_PAGE)] or [[]]
+    for page_offset, rows_on_page in enumerate(page_rows):
+        y = page_height - 0.7 * inch
+        pdf.setFont("Helvetica-Bold", 14)
+        pdf.drawString(0.6 * inch, y, title)
+        pdf.setFont("Helvetica", 8)
+        pdf.drawRightString(page_width - 0.6 * inch, y, f"Page {first_page_number + page_offset}")
+        y -= 0.22 * inch
+        pdf.drawString(0.6 * inch, y, subtitle)
+        y -= 0.3 * inch
+
+        pdf.setFont("Helvetica-Bold", 9)
+        for x, label, align in _COLUMNS:
+            (pdf.drawRightString if align == 'right' else pdf.drawString)(x, y, label)
+        y -= 0.08 * inch
+        pdf.line(0.6 * inch, y, page_width - 0.6 * inch, y)
+        y -= 0.18 * inch
+
+        if not rows_on_page:
+            pdf.setFont("Helvetica-Oblique", 9)
+            pdf.drawString(0.6 * inch, y, "No items match this report.")
+        for short_id, name, category, quantity, price in rows_on_page:
+            # Low stock rows are printed in bold so they stand out in the full catalog
+            pdf.setFont("Helvetica-Bold" if quantity <= low_stock_threshold else "Helvetica", 8)
+            if len(name) > _MAX_NAME_CHARS:
+                name = name[:_MAX_NAME_CHARS - 3] + "..."
+            values = (short_id, name, category, str(quantity), f"{currency_symbol}{price:,.2f}",
+                      f"{currency_symbol}{quantity * price:,.2f}")
+            for (x, _, align), value in zip(_COLUMNS, values):
+                (pdf.drawRightString if align == 'right' else pdf.drawString)(x, y, value)
+            y -= 0.215 * inch
+        pdf.showPage()
+    pdf.save()
+    return chunk_index, path, len(page_rows)
+
+class _StreamingPdfMerger:
+    """
+    Concatenates PDFs into one file without holding the combined document in memory.
+    Each appended file's pages and the objects they reference are renumbered and written out
+    immediately; only the object offsets and page references are kept for the final page tree
+    and cross-reference table.
+    """
+    _CATALOG_NUMBER = 1
+    _PAGES_NUMBER = 2
+
+    def __init__(self, output_file):
+        self.output = output_file
+        self.offsets = {} # Object number -> byte offset in the output
+        self.page_numbers = [] # Object numbers of the pages, in order
+        self.next_number = self._PAGES_NUMBER + 1
+        self.output.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def append(self, path):
+        """Copies every page of the PDF at path to the end of the output."""
+        reader = PdfReader(path)
+        new_numbers = {} # (object number, generation) in this file -> number in the output
+        to_write = []
+        pages_ref = IndirectObject(self._PAGES_NUMBER, 0, None)
+
+        def renumber(reference):
+            key = (reference.idnum, reference.generation)
+            if key not in new_numbers:
+                new_numbers[key] = self.next_number
+                self.next_number += 1
+                to_write.append(reference)
+            return IndirectObject(new_numbers[key], 0, None)
+
+        for page in reader.pages:
+            for key in _INHERITED_PAGE_KEYS:
+                inherited = page.get_inherited(key, None) if key not in page else None
+                if inherited is not None:
+                    page[NameObject(key)] = inherited
+            page[NameObject('/Parent')] = pages_ref # The source page tree is not copied
+            self.page_numbers.append(renumber(page.indirect_reference).idnum)
+
+        # Writing an object can discover further referenced objects, so to_write grows while we go
+        while to_write:
+            reference = to_write.pop(0)
+            obj = _renumber_references(reader.get_object(reference), renumber)
+            self._write_object(new_numbers[(reference.idnum, reference.generation)], obj)
+
+    def close(self):
+        """Writes the page tree, catalog, cross-reference table and trailer."""
+        kids = ArrayObject(IndirectObject(number, 0, None) for number in self.page_numbers)
+        self._write_object(self._PAGES_NUMBER, DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'), NameObject('/Kids'): kids,
+            NameObject('/Count'): NumberObject(len(self.page_numbers)),
+        }))
+        self._write_object(self._CATALOG_NUMBER, DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(self._PAGES_NUMBER, 0, None),
+        }))
+        xref_offset = self.output.tell()
+        self.output.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_number)
+        for number in range(1, self.next_number):
+            self.output.write(b"%010d 00000 n \n" % self.offsets[number])
+        self.output.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                          % (self.next_number, self._CATALOG_NUMBER, xref_offset))
+
+    def _write_object(self, number, obj):
+        self.offsets[number] = self.output.tell()
+        self.output.write(b"%d 0 obj\n" % number)
+        obj.write_to_stream(self.output)
+        self.output.write(b"\nendobj\n")
+
+def _renumber_references(obj, renumber):
+    """Replaces the indirect references inside obj (in place) with references into the output file."""
+    if isinstance(obj, IndirectObject):
+        return renumber(obj)
+    if isinstance(obj, DictionaryObject): # Also stream objects; their encoded data is written unchanged
+        for key, value in list(obj.items()):
+            obj[key] = _renumber_references(value, renumber)
+    elif isinstance(obj, ArrayObject):
+        for index, value in enumerate(obj):
+            obj[index] = _renumber_references(value, renumber)
+    return obj
+
+def build_report_pdf(rows, output_path, title, subtitle="", workers=None, chunk_pages=DEFAULT_CHUNK_PAGES,
+                     progress_callback=None):
+    """
+    Renders an iterable of report rows into one PDF at output_path, chunk by chunk in a process pool.
+    progress_callback(items_rendered) is called as chunks finish.
+    Returns a summary dict ('path', 'items', 'pages', 'chunks', 'workers', 'elapsed_seconds', 'pages_per_second').
+    """
+    started = time.perf_counter()
+    workers = workers or get_report_worker_count()
+    chunk_size = chunk_pages * ROWS_PER_PAGE
+    header = (title, subtitle, get_currency_symbol(), get_low_stock_threshold())
+    summary = {'path': output_path, 'items': 0, 'pages': 0, 'chunks': 0, 'workers': workers}
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix='report-', dir=output_dir) as temp_dir:
+        # Written to a temporary file and moved into place once complete
+        merged_path = os.path.join(temp_dir, "merged.pdf")
+        merged_file = open(merged_path, 'wb')
+        merger = _StreamingPdfMerger(merged_file)
+        rendered_items = 0
+
+        def collect(result, chunk_length):
+            # Called in chunk order, so each chunk is appended to the output as soon as it is done
+            nonlocal rendered_items
+            chunk_index, path, page_count = result
+            merger.append(path)
+            os.remove(path)
+            summary['chunks'] += 1
+            summary['pages'] += page_count
+            rendered_items += chunk_length
+            if progress_callback:
+                progress_callback(rendered_items)
+
+        try:
+            jobs = (
+                (chunk_index, chunk_index * chunk_pages + 1, chunk, header, temp_dir)
+                for chunk_index, chunk in enumerate(_batched(rows, chunk_size))
+            )
+            if workers == 1:
+                # No pool: avoids process start-up for small reports (and is the benchmark baseline)
+                for job in jobs:
+                    summary['items'] += len(job[2])
+                    collect(_render_chunk(job), len(job[2]))
+            else:
+                # Workers are spawned, not forked: the Streamlit server is multi-threaded (Tornado, cache
+                # watcher, PDF workers, pymongo monitors) and a forked child can deadlock on a lock
+                # another thread held at fork time.
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                    in_flight = deque()
+                    for job in jobs:
+                        summary['items'] += len(job[2])
+                        in_flight.append((pool.submit(_render_chunk, job), len(job[2])))
+                        # Bounded memory: wait for the oldest chunk before reading further ahead
+                        while len(in_flight) >= workers * 2:
+                            future, chunk_length = in_flight.popleft()
+                            collect(future.result(), chunk_length)
+                    while in_flight:
+                        future, chunk_length = in_flight.popleft()
+                        collect(future.result(), chunk_length)
+
+            if not summary['chunks']:
+                collect(_render_chunk((0, 1, [], header, temp_dir)), 0) # An empty report still gets a page
+
+            merger.close()
+        finally:
+            merged_file.close()
+        os.replace(merged_path, output_path)
+
+    summary['elapsed_seconds'] = time.perf_counter() - started
+    summary['pages_per_second'] = summary['pages'] / summary['elapsed_seconds'] if summary['elapsed_seconds'] else 0.0
+    return summary
+
+def get_report_retention_seconds():
+    """Age after which generated reports are removed (REPORT_RETENTION_HOURS, default 24; 0 keeps them)."""
+    try:
+        return max(float(os.getenv("REPORT_RETENTION_HOURS", str(REPORT_RETENTION_HOURS))), 0) * 3600
+    except ValueError:
+        return REPORT_RETENTION_HOURS * 3600
+
+def collect_old_reports(max_age_seconds=None):
+    """
+    Removes catalog / low stock reports in static/pdfs that are older than max_age_seconds
+    (default: get_report_retention_seconds()). Every generation writes a new timestamped file,
+    so without this the directory grows with every click. Returns the number of files removed.
+    """
+    max_age_seconds = get_report_retention_seconds() if max_age_seconds is None else max_age_seconds
+    pdf_dir = get_pdf_dir()
+    if not max_age_seconds or not os.path.isdir(pdf_dir):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    for filename in os.listdir(pdf_dir):
+        if not _REPORT_FILE_PATTERN.match(filename):
+            continue
+        report_path = os.path.join(pdf_dir, filename)
+        try:
+            if os.path.getmtime(report_path) < cutoff:
+                os.remove(report_path)
+                removed += 1
+        except OSError as e:
+            print(f"Warning: Could not delete old report '{filename}': {e}")
+    return removed
+
+def generate_catalog_report(category=None, low_stock=False, output_path=None, workers=None,
+                            chunk_pages=DEFAULT_CHUNK_PAGES, progress_callback=None):
+    """
+    Builds the catalog (or, with low_stock=True, the low stock) report from the database,
+    optionally for a single category. Saved to static/pdfs unless output_path is given.
+    Returns the summary from build_report_pdf plus 'filename'.
+    """
+    generated_at = datetime.now()
+    title = "Low Stock Report" if low_stock else "Inventory Catalog"
+    filters = [f"Category: {category}" if category else "All categories"]
+    if low_stock:
+        filters.append(f"Quantity <= {get_low_stock_threshold()}")
+    subtitle = f"{' | '.join(filters)} | Generated {generated_at:%Y-%m-%d %H:%M}"
+
+    if output_path is None:
+        collect_old_reports() # Reports are only written here, so sweeping before each one keeps the directory bounded
+        prefix = "Low_Stock_Report" if low_stock else "Catalog_Report"
+        category_part = f"_{category.replace(' ', '_')}" if category else ""
+        output_path = os.path.join(get_pdf_dir(), f"{prefix}{category_part}_{generated_at:%Y-%m-%d_%H%M%S}.pdf")
+
+    summary = build_report_pdf(iter_report_rows(category, low_stock), output_path, title, subtitle,
+                               workers=workers, chunk_pages=chunk_pages, progress_callback=progress_callback)
+    summary['filename'] = os.path.basename(output_path)
+    return summary
+
+
+# --- Benchmark ---
+def _synthetic_rows(item_count):
+    categories = ["Electronics", "Books", "Clothing", "Home Goods", "Food"]
+    for index in range(item_count):
+        yield (f"{index:08x}", f"Benchmark item {index}", categories[index % len(categories)],
+               index % 50, 1.5 + (index % 100))
+
+def benchmark_report(item_count=100000, worker_options=None, chunk_pages=DEFAULT_CHUNK_PAGES):
+    """Renders item_count synthetic rows with each worker count and returns the summaries (pages per second etc.)."""
+    worker_options = worker_options or sorted({1, get_report_worker_count()})
+    results = []
+    with tempfile.TemporaryDirectory(prefix='report-benchmark-') as temp_dir:
+        for workers in worker_options:
+            output_path = os.path.join(temp_dir, f"benchmark-{workers}.pdf")
+            summary = build_report_pdf(_synthetic_rows(item_count), output_path, "Benchmark Catalog",
+                                       f"{item_count} synthetic items", workers=workers, chunk_pages=chunk_pages)
+            summary['size_mb'] = os.path.getsize(output_path) / (1024 * 1024)
+            results.append(summary)
+    return results
+
+
+def main(argv=None):
+    """Command line entry point: python report_service.py [--category C] [--low-stock] [--output PATH] [--workers N] | --benchmark N"""
+    parser = argparse.ArgumentParser(description="Generate the inventory catalog or low stock report as a PDF.")
+    parser.add_argument('--category', help="Only include items of this category.")
+    parser.add_argument('--low-stock', action='store_true', help="Only include items at or below the low stock threshold.")
+    parser.add_argument('--output', help="Where to write the PDF (default: static/pdfs).")
+    parser.add_argument('--workers', type=int, help="Rendering processes (default: REPORT_WORKERS or the CPU count).")
+    parser.add_argument('--chunk-pages', type=int, default=DEFAULT_CHUNK_PAGES, help="Pages rendered per job.")
+    parser.add_argument('--benchmark', type=int, metavar='ITEMS', help="Render ITEMS synthetic rows instead and report pages per second.")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        worker_options = sorted({1, args.workers or get_report_worker_count()})
+        for summary in benchmark_report(args.benchmark, worker_options, args.chunk_pages):
+            print(f"{summary['workers']} worker(s): {summary['items']} items, {summary['pages']} pages in "
+                  f"{summary['elapsed_seconds']:.1f}s = {summary['pages_per_second']:.0f} pages/s "
+                  f"({summary['size_mb']:.1f} MB)")
+        return 0
+
+    summary = generate_catalog_report(args.category, args.low_stock, args.output, args.workers, args.chunk_pages,
+                                      progress_callback=lambda rendered: print(f"{rendered} items rendered...", end='\r'))
+    print(f"\nWrote {summary['path']}: {summary['items']} items, {summary['pages']} pages in "
+          f"{summary['elapsed_seconds']:.1f}s ({summary['pages_per_second']:.0f} pages/s).")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,964 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import DuplicateKeyError
+
+from utils import is_valid_email, BASE_DIR
+
+DEFAULT_ITER_BATCH_SIZE = 500 # Documents fetched per round trip by the iter_* functions
+
+# --- Storage Interface ---
+# db_operations talks to MongoDB by default. When STORAGE_BACKEND selects another backend,
+# every public data function in db_operations is routed to the method of the same name here.
+# Backends return documents shaped like the MongoDB ones: '_id' is an ObjectId and 'id' its string form.
+# MongoDB itself is not a StorageBackend subclass: its implementation is the body of each db_operations
+# function, which runs when no local backend is configured. db_operations checks at import time
+# that those functions and the methods below have the same names and parameters.
+class StorageBackend(ABC):
+    """Interface covering the user, inventory and supplier operations of db_operations."""
+
+    name = None
+
+    # Users
+    @abstractmethod
+    def load_users(self): ...
+    @abstractmethod
+    def count_users(self): ...
+    def estimated_count_users(self): return self.count_users()
+    @abstractmethod
+    def count_admins(self): ...
+    @abstractmethod
+    def exists_username_ci(self, username, exclude_user_id=None): ...
+    @abstractmethod
+    def add_user(self, user_data): ...
+    @abstractmethod
+    def find_user_by_username(self, username): ...
+    @abstractmethod
+    def find_user_by_id(self, user_id): ...
+    @abstractmethod
+    def update_user(self, user_id, updates): ...
+    @abstractmethod
+    def delete_user(self, user_id): ...
+
+    # Inventory
+    @abstractmethod
+    def get_all_inventory_items(self): ...
+    @abstractmethod
+    def query_inventory_items(self, search_term=None, category=None, page=1, page_size=24): ...
+    @abstractmethod
+    def count_inventory_items(self, search_term=None, category=None): ...
+    def estimated_count_inventory_items(self): return self.count_inventory_items()
+    @abstractmethod
+    def get_inventory_summary(self, low_stock_threshold): ...
+    @abstractmethod
+    def get_low_stock_items(self, low_stock_threshold): ...
+    @abstractmethod
+    def add_inventory_item(self, item_data): ...
+    @abstractmethod
+    def bulk_upsert_inventory_items(self, items): ...
+    @abstractmethod
+    def find_inventory_items_pending_pdf(self, limit=50): ...
+    @abstractmethod
+    def update_inventory_item(self, item_id, updates): ...
+    @abstractmethod
+    def set_inventory_pdf_state(self, item_id, pdf_status, pdf_filename=None): ...
+    @abstractmethod
+    def adjust_inventory_quantity(self, item_id, delta): ...
+    @abstractmethod
+    def delete_inventory_item(self, item_id): ...
+    @abstractmethod
+    def find_inventory_item_by_id(self, item_id): ...
+
+    # Suppliers
+    @abstractmethod
+    def get_all_suppliers(self): ...
+    @abstractmethod
+    def count_suppliers(self): ...
+    def estimated_count_suppliers(self): return self.count_suppliers()
+    @abstractmethod
+    def add_supplier(self, supplier_data): ...
+    @abstractmethod
+    def bulk_upsert_suppliers(self, suppliers): ...
+    @abstractmethod
+    def update_supplier(self, supplier_id, updates): ...
+    @abstractmethod
+    def delete_supplier(self, supplier_id): ...
+    @abstractmethod
+    def find_supplier_by_id(self, supplier_id): ...
+    @abstractmethod
+    def find_suppliers_by_category(self, category_name): ...
+    @abstractmethod
+    def get_supplier_contacts_by_category(self, categories): ...
+
+    # Daily report state
+    @abstractmethod
+    def get_report_snapshots(self, item_ids): ...
+    @abstractmethod
+    def save_report_snapshots(self, snapshots): ...
+    @abstractmethod
+    def delete_report_snapshots(self, item_ids): ...
+    @abstractmethod
+    def iter_report_snapshots(self, batch_size=DEFAULT_ITER_BATCH_SIZE): ...
+    @abstractmethod
+    def get_daily_report_summary(self, report_date): ...
+    @abstractmethod
+    def get_latest_daily_report_summary(self, before_date): ...
+    @abstractmethod
+    def save_daily_report_summary(self, summary): ...
+
+    # Streaming iterators. The defaults filter and sort the list results in Python, which is
+    # fine for the in-memory backend; SQLiteBackend overrides them to read in bounded batches.
+    def iter_users(self, batch_size=DEFAULT_ITER_BATCH_SIZE, projection=None, sort=None, start_after_id=None):
+        return _iter_documents(self.load_users(), projection, sort, start_after_id)
+
+    def iter_inventory_items(self, batch_size=DEFAULT_ITER_BATCH_SIZE, projection=None, sort=None, start_after_id=None,
+                             category=None, max_quantity=None, updated_since=None):
+        updated_since = as_utc(updated_since) if updated_since is not None else None
+        items = [item for item in self.get_all_inventory_items()
+                 if (not category or category == "All" or item.get('category') == category)
+                 and (max_quantity is None or item.get('quantity', 0) <= max_quantity)
+                 and (updated_since is None or (item.get('updated_at') and as_utc(item['updated_at']) > updated_since))]
+        return _iter_documents(items, projection, sort, start_after_id)
+
+    def iter_suppliers(self, batch_size=DEFAULT_ITER_BATCH_SIZE, projection=None, sort=None, start_after_id=None):
+        return _iter_documents(self.get_all_suppliers(), projection, sort, start_after_id)
+
+    def close(self):
+        """Releases any resources held by the backend."""
+
+
+def _valid_id(id_str):
+    """Returns the id as a string if it is a valid ObjectId string, otherwise None."""
+    try:
+        return str(ObjectId(id_str))
+    except (InvalidId, TypeError):
+        return None
+
+def utc_now():
+    """Current time as a timezone-aware UTC datetime (the updated_at stamp of inventory writes)."""
+    return datetime.now(timezone.utc)
+
+def as_utc(value):
+    """Makes a datetime timezone-aware UTC (MongoDB returns naive UTC datetimes)."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _strip_ids(updates):
+    """Returns a copy of an update dict without the immutable '_id'/'id' keys."""
+    return {k: v for k, v in updates.items() if k not in ('_id', 'id')}
+
+def _contacts_from_suppliers(suppliers, categories):
+    """Builds the {category: {'emails', 'names'}} map from supplier documents, validating each email once."""
+    contacts = {category: {'emails': [], 'names': []} for category in categories if category}
+    for supplier in suppliers:
+        email = supplier.get('email')
+        if not is_valid_email(email):
+            continue
+        for category in supplier.get('categories') or []:
+            if category in contacts:
+                contacts[category]['emails'].append(email)
+                contacts[category]['names'].append(supplier.get('name', email))
+    return contacts
+
+# --- Iterator Options ---
+def normalize_iter_options(projection=None, sort=None, start_after_id=None):
+    """
+    Validates the options shared by the iter_* functions. Returns (fields, sort, start_after_id):
+    fields is a tuple of field names (None for whole documents), sort a list of (field, direction)
+    pairs (None for _id order) and start_after_id a validated id string or None.
+    """
+    if isinstance(projection, dict):
+        fields = tuple(field for field, include in projection.items() if include and field not in ('_id', 'id'))
+    elif projection is not None:
+        fields = tuple(field for field in projection if field not in ('_id', 'id'))
+    else:
+        fields = None
+    sort = [(field, direction) for field, direction in sort] if sort else None
+    if start_after_id is not None:
+        # Resuming from a checkpoint relies on the stable _id order
+        if sort:
+            raise ValueError("start_after_id can only be used with the default _id order (sort=None).")
+        start_after_id = _valid_id(start_after_id)
+        if start_after_id is None:
+            raise ValueError("start_after_id is not a valid id.")
+    return fields, sort, start_after_id
+
+def _project(doc, fields):
+    """Keeps only the given fields of a document (plus '_id' and 'id')."""
+    if fields is None:
+        return doc
+    projected = {field: doc[field] for field in fields if field in doc}
+    projected['_id'], projected['id'] = doc['_id'], doc['id']
+    return projected
+
+def _sort_value(value):
+    """Sort key that places missing/None values first, like MongoDB does."""
+    return (value is not None, value)
+
+def _iter_documents(docs, projection, sort, start_after_id):
+    """Generic iterator over an already loaded list of documents, applying the iter_* options."""
+    fields, sort, start_after_id = normalize_iter_options(projection, sort, start_after_id)
+    if sort:
+        for field, direction in reversed(sort): # Stable sorts, least significant key first
+            docs.sort(key=lambda doc: _sort_value(doc.get(field)), reverse=direction < 0)
+    else:
+        docs.sort(key=lambda doc: doc['id']) # Hex ObjectId strings sort in creation order
+        if start_after_id:
+            docs = [doc for doc in docs if doc['id'] > start_after_id]
+    for doc in docs:
+        yield _project(doc, fields)
+
+
+# --- In-memory Backend ---
+class MemoryBackend(StorageBackend):
+    """
+    Keeps everything in process memory. Data is lost on restart; intended for tests,
+    demos and reproducible benchmarks without any database.
+    """
+
+    name = 'memory'
+
+    def __init__(self):
+        self._collections = {'users': {}, 'inventory': {}, 'suppliers': {}, 'report_snapshots': {}, 'daily_reports': {}}
+        self._lock = threading.RLock()
+
+    def _out(self, doc_id, doc):
+        result = copy.deepcopy(doc)
+        result['_id'] = ObjectId(doc_id)
+        result['id'] = doc_id
+        return result
+
+    def _all(self, collection):
+        with self._lock:
+            return [self._out(doc_id, doc) for doc_id, doc in self._collections[collection].items()]
+
+    def _insert(self, collection, data):
+        doc_id = str(ObjectId())
+        data['_id'] = ObjectId(doc_id) # Mirror insert_one(), which adds _id to the passed dict
+        with self._lock:
+            self._collections[collection][doc_id] = copy.deepcopy(_strip_ids(data))
+        return doc_id
+
+    def _find(self, collection, doc_id):
+        doc_id = _valid_id(doc_id)
+        with self._lock:
+            doc = self._collections[collection].get(doc_id) if doc_id else None
+            return self._out(doc_id, doc) if doc is not None else None
+
+    def _update(self, collection, doc_id, updates):
+        doc_id = _valid_id(doc_id)
+        updates = _strip_ids(updates)
+        with self._lock:
+            doc = self._collections[collection].get(doc_id) if doc_id else None
+            if doc is None:
+                return False
+            changed = any(doc.get(k) != v for k, v in updates.items())
+            doc.update(copy.deepcopy(updates))
+            return changed
+
+    def _delete(self, collection, doc_id):
+        doc_id = _valid_id(doc_id)
+        with self._lock:
+            return bool(doc_id) and self._collections[collection].pop(doc_id, None) is not None
+
+    def _upsert_by(self, collection, docs, key_fields, insert_only_fields, on_change=None):
+        """Upserts docs keyed by key_fields; on_change fields are only written on insert or when a field really changed."""
+        on_change = on_change or {}
+        inserted, updated = 0, 0
+        with self._lock:
+            stored = self._collections[collection]
+            index = {tuple(doc.get(f) for f in key_fields): doc_id for doc_id, doc in stored.items()}
+            for data in docs:
+                key = tuple(data.get(f) for f in key_fields)
+                fields = _strip_ids(data)
+                if key in index:
+                    doc = stored[index[key]]
+                    for field in insert_only_fields:
+                        fields.pop(field, None)
+                    if any(doc.get(k) != v for k, v in fields.items()):
+                        updated += 1
+                        doc.update(copy.deepcopy(dict(fields, **on_change)))
+                else:
+                    doc_id = str(ObjectId())
+                    stored[doc_id] = copy.deepcopy(dict(fields, **on_change))
+                    index[key] = doc_id
+                    inserted += 1
+        return inserted, updated, {}
+
+    # Users
+    def load_users(self):
+        return self._all('users')
+
+    def count_users(self):
+        return len(self._collections['users'])
+
+    def count_admins(self):
+        with self._lock:
+            return sum(1 for doc in self._collections['users'].values() if doc.get('role') == 'admin')
+
+    def exists_username_ci(self, username, exclude_user_id=None):
+        existing = self.find_user_by_username(username)
+        return existing is not None and existing['id'] != exclude_user_id
+
+    def add_user(self, user_data):
+        if self.find_user_by_username(user_data.get('username', '')):
+            raise DuplicateKeyError(f"Username '{user_data.get('username')}' already exists.")
+        return self._insert('users', user_data)
+
+    def find_user_by_username(self, username):
+        with self._lock:
+            for doc_id, doc in self._collections['users'].items():
+                if str(doc.get('username', '')).lower() == str(username).lower():
+                    return self._out(doc_id, doc)
+        return None
+
+    def find_user_by_id(self, user_id):
+        return self._find('users', user_id)
+
+    def update_user(self, user_id, updates):
+        if 'username' in updates:
+            existing = self.find_user_by_username(updates['username'])
+            if existing and existing['id'] != user_id:
+                raise DuplicateKeyError(f"Username '{updates['username']}' already exists.")
+        return self._update('users', user_id, updates)
+
+    def delete_user(self, user_id):
+        return self._delete('users', user_id)
+
+    # Inventory
+    def get_all_inventory_items(self):
+        return self._all('inventory')
+
+    def query_inventory_items(self, search_term=None, category=None, page=1, page_size=24):
+        page, page_size = max(int(page), 1), max(int(page_size), 1)
+        needle = (search_term or '').lower()
+        matches = [item for item in self._all('inventory')
+                   if needle in str(item.get('name', '')).lower()
+                   and (not category or category == "All" or item.get('category') == category)]
+        matches.sort(key=lambda item: (item.get('name', ''), item['id']))
+        start = (page - 1) * page_size
+        return matches[start:start + page_size], len(matches)
+
+    def count_inventory_items(self, search_term=None, category=None):
+        return self.query_inventory_items(search_term, category, page=1, page_size=1)[1]
+
+    def get_inventory_summary(self, low_stock_threshold):
+        items = self._all('inventory')
+        category_counts = {}
+        for item in items:
+            category = item.get('category') or 'N/A'
+            category_counts[category] = category_counts.get(category, 0) + 1
+        return {
+            'total_items': len(items),
+            'total_value': sum((item.get('quantity') or 0) * (item.get('price') or 0) for item in items),
+            'low_stock_count': sum(1 for item in items if item.get('quantity', 0) <= low_stock_threshold),
+            'category_counts': sorted(category_counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        }
+
+    def get_low_stock_items(self, low_stock_threshold):
+        items = [item for item in self._all('inventory') if item.get('quantity', 0) <= low_stock_threshold]
+        return sorted(items, key=lambda item: (item.get('quantity', 0), item.get('name', '')))
+
+    def add_inventory_item(self, item_data):
+        item_data['updated_at'] = utc_now()
+        return self._insert('inventory', item_data)
+
+    def bulk_upsert_inventory_items(self, items):
+        now = utc_now()
+        docs = [dict(item, pdf_filename=item.get('pdf_filename')) for item in items]
+        # Only new or actually changed items need a new PDF and count as updated by the daily report
+        return self._upsert_by('inventory', docs, ('name', 'category'), ('pdf_filename',),
+                               on_change={'pdf_status': 'pending', 'updated_at': now})
+
+    def find_inventory_items_pending_pdf(self, limit=50):
+        return [item for item in self._all('inventory') if item.get('pdf_status') == 'pending'][:limit]
+
+    def update_inventory_item(self, item_id, updates):
+        return self._update('inventory', item_id, dict(updates, updated_at=utc_now()))
+
+    def set_inventory_pdf_state(self, item_id, pdf_status, pdf_filename=None):
+        updates = {'pdf_status': pdf_status}
+        if pdf_filename is not None:
+            updates['pdf_filename'] = pdf_filename
+        return self._update('inventory', item_id, updates) # No updated_at: the printed content is unchanged
+
+    def adjust_inventory_quantity(self, item_id, delta):
+        doc_id = _valid_id(item_id)
+        with self._lock:
+            doc = self._collections['inventory'].get(doc_id) if doc_id else None
+            if doc is None or doc.get('quantity', 0) + delta < 0:
+                return None
+            doc['quantity'] = doc.get('quantity', 0) + delta
+            doc['updated_at'] = utc_now()
+            return self._out(doc_id, doc)
+
+    def delete_inventory_item(self, item_id):
+        return self._delete('inventory', item_id)
+
+    def find_inventory_item_by_id(self, item_id):
+        return self._find('inventory', item_id)
+
+    # Suppliers
+    def get_all_suppliers(self):
+        return self._all('suppliers')
+
+    def count_suppliers(self):
+        return len(self._collections['suppliers'])
+
+    def add_supplier(self, supplier_data):
+        return self._insert('suppliers', supplier_data)
+
+    def bulk_upsert_suppliers(self, suppliers):
+        return self._upsert_by('suppliers', suppliers, ('email',), ('created_at',))
+
+    def update_supplier(self, supplier_id, updates):
+        return self._update('suppliers', supplier_id, updates)
+
+    def delete_supplier(self, supplier_id):
+        return self._delete('suppliers', supplier_id)
+
+    def find_supplier_by_id(self, supplier_id):
+        return self._find('suppliers', supplier_id)
+
+    def find_suppliers_by_category(self, category_name):
+        return [s for s in self._all('suppliers') if category_name in (s.get('categories') or [])]
+
+    def get_supplier_contacts_by_category(self, categories):
+        return _contacts_from_suppliers(self._all('suppliers'), categories)
+
+
+    # Daily report state
+    def get_report_snapshots(self, item_ids):
+        with self._lock:
+            stored = self._collections['report_snapshots']
+            return {item_id: copy.deepcopy(stored[item_id]) for item_id in item_ids if item_id in stored}
+
+    def save_report_snapshots(self, snapshots):
+        with self._lock:
+            self._collections['report_snapshots'].update(copy.deepcopy(snapshots))
+
+    def delete_report_snapshots(self, item_ids):
+        with self._lock:
+            for item_id in item_ids:
+                self._collections['report_snapshots'].pop(item_id, None)
+
+    def iter_report_snapshots(self, batch_size=DEFAULT_ITER_BATCH_SIZE):
+        with self._lock:
+            snapshots = [dict(copy.deepcopy(doc), id=item_id) for item_id, doc in sorted(self._collections['report_snapshots'].items())]
+        return iter(snapshots)
+
+    def get_daily_report_summary(self, report_date):
+        with self._lock:
+            return copy.deepcopy(self._collections['daily_reports'].get(report_date))
+
+    def get_latest_daily_report_summary(self, before_date):
+        with self._lock:
+            earlier = [report_date for report_date in self._collections['daily_reports'] if report_date < before_date]
+            return copy.deepcopy(self._collections['daily_reports'][max(earlier)]) if earlier else None
+
+    def save_daily_report_summary(self, summary):
+        with self._lock:
+            self._collections['daily_reports'][summary['report_date']] = copy.deepcopy(summary)
+
+# --- SQLite Backend ---
+# Queried fields live in indexed columns; everything else is kept in a JSON 'doc' column.
+# Supplier categories get their own table, the SQL equivalent of MongoDB's multikey index.
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    role TEXT,
+    doc TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_username_ci ON users(username COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS users_role ON users(role);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    price REAL NOT NULL DEFAULT 0,
+    pdf_status TEXT,
+    updated_at TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS inventory_category_name ON inventory(category, name);
+CREATE INDEX IF NOT EXISTS inventory_quantity ON inventory(quantity);
+CREATE INDEX IF NOT EXISTS inventory_name ON inventory(name);
+CREATE INDEX IF NOT EXISTS inventory_pdf_status ON inventory(pdf_status);
+
+CREATE TABLE IF NOT EXISTS suppliers (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS suppliers_email ON suppliers(email);
+
+CREATE TABLE IF NOT EXISTS supplier_categories (
+    category TEXT NOT NULL,
+    supplier_id TEXT NOT NULL REFERENCES suppliers(id) ON DELETE CASCADE,
+    PRIMARY KEY (category, supplier_id)
+);
+
+CREATE TABLE IF NOT EXISTS report_snapshots (
+    id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS daily_reports (
+    report_date TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+"""
+
+# Columns stored outside the JSON document, per table
+_SQLITE_COLUMNS = {
+    'users': ('username', 'role'),
+    'inventory': ('name', 'category', 'quantity', 'price', 'pdf_status', 'updated_at'),
+    'suppliers': ('name', 'email'),
+}
+# Timestamp columns are stored as fixed-width UTC ISO strings, so they compare correctly as text
+_SQLITE_DATETIME_COLUMNS = {'updated_at'}
+
+def _datetime_to_sqlite(value):
+    return as_utc(value).isoformat(timespec='microseconds') if isinstance(value, datetime) else value
+
+
+def _integrity_error(error):
+    """Maps a SQLite constraint failure to the exception MongoDB code expects: unique violations become DuplicateKeyError."""
+    if str(error).startswith("UNIQUE constraint failed"):
+        return DuplicateKeyError(str(error))
+    return ValueError(f"Invalid document: {error}") # e.g. a NOT NULL column such as users.username is missing
+
+class SQLiteBackend(StorageBackend):
+    """
+    Embedded SQLite storage for edge/offline sites and local performance testing.
+    Each thread gets its own connection; the database runs in WAL mode so readers don't block writers.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path):
+        if path == ':memory:':
+            # Connections are per thread, and every ':memory:' connection is a separate, empty database
+            raise ValueError("SQLITE_PATH=':memory:' is not supported; use STORAGE_BACKEND=memory for a non-persistent store.")
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as conn:
+            conn.executescript(_SQLITE_SCHEMA)
+            self._upgrade_schema(conn)
+
+    def _upgrade_schema(self, conn):
+        """Adds columns introduced after a database file was created (CREATE TABLE IF NOT EXISTS keeps old tables as they are)."""
+        inventory_columns = {row['name'] for row in conn.execute("PRAGMA table_info(inventory)")}
+        if 'updated_at' not in inventory_columns:
+            conn.execute("ALTER TABLE inventory ADD COLUMN updated_at TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS inventory_updated_at ON inventory(updated_at)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Row <-> document conversion
+    def _row_to_doc(self, table, row):
+        doc = json.loads(row['doc'])
+        for column in _SQLITE_COLUMNS[table]:
+            if column in _SQLITE_DATETIME_COLUMNS and row[column] is not None:
+                doc[column] = datetime.fromisoformat(row[column])
+            elif row[column] is not None or column in doc:
+                doc[column] = row[column]
+        doc['_id'] = ObjectId(row['id'])
+        doc['id'] = row['id']
+        return doc
+
+    def _split_doc(self, table, data):
+        columns = {column: _datetime_to_sqlite(data.get(column)) for column in _SQLITE_COLUMNS[table]}
+        rest = {k: v for k, v in _strip_ids(data).items() if k not in columns}
+        return columns, json.dumps(rest, default=str)
+
+    def _select(self, table, where='', params=(), suffix=''):
+        sql = f"SELECT * FROM {table} {('WHERE ' + where) if where else ''} {suffix}"
+        return [self._row_to_doc(table, row) for row in self._connection().execute(sql, params)]
+
+    def _write_doc(self, conn, table, doc_id, data, insert):
+        columns, doc_json = self._split_doc(table, data)
+        if insert:
+            names = ['id'] + list(columns) + ['doc']
+            conn.execute(
+                f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                [doc_id] + list(columns.values()) + [doc_json]
+            )
+        else:
+            assignments = ", ".join(f"{name} = ?" for name in list(columns) + ['doc'])
+            conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", list(columns.values()) + [doc_json, doc_id])
+        if table == 'suppliers':
+            conn.execute("DELETE FROM supplier_categories WHERE supplier_id = ?", (doc_id,))
+            conn.executemany("INSERT OR IGNORE INTO supplier_categories (category, supplier_id) VALUES (?, ?)",
+                             [(category, doc_id) for category in data.get('categories') or []])
+
+    def _insert(self, table, data):
+        doc_id = str(ObjectId())
+        data['_id'] = ObjectId(doc_id) # Mirror insert_one(), which adds _id to the passed dict
+        with self._write_lock, self._connection() as conn:
+            try:
+                self._write_doc(conn, table, doc_id, data, insert=True)
+            except sqlite3.IntegrityError as e:
+                raise _integrity_error(e)
+        return doc_id
+
+    def _find(self, table, doc_id):
+        doc_id = _valid_id(doc_id)
+        if not doc_id:
+            return None
+        docs = self._select(table, "id = ?", (doc_id,))
+        return docs[0] if docs else None
+
+    def _update(self, table, doc_id, updates):
+        with self._write_lock, self._connection() as conn:
+            existing = self._find(table, doc_id)
+            if existing is None:
+                return False
+            updates = _strip_ids(updates)
+            changed = any(existing.get(k) != v for k, v in updates.items())
+            existing.update(updates)
+            try:
+                self._write_doc(conn, table, existing['id'], existing, insert=False)
+            except sqlite3.IntegrityError as e:
+                raise _integrity_error(e)
+            return changed
+
+    def _delete(self, table, doc_id):
+        doc_id = _valid_id(doc_id)
+        if not doc_id:
+            return False
+        with self._write_lock, self._connection() as conn:
+            return conn.execute(f"DELETE FROM {table} WHERE id = ?", (doc_id,)).rowcount > 0
+
+    def _count(self, table):
+        return self._connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _upsert_by(self, table, docs, key_fields, insert_only_fields, on_change=None):
+        """Upserts docs keyed by key_fields; on_change fields are only written on insert or when a field really changed."""
+        on_change = on_change or {}
+        inserted, updated, errors = 0, 0, {}
+        where = " AND ".join(f"{field} IS ?" for field in key_fields)
+        with self._write_lock, self._connection() as conn:
+            for index, data in enumerate(docs):
+                rows = self._select(table, where, tuple(data.get(f) for f in key_fields), "LIMIT 1")
+                fields = _strip_ids(data)
+                try:
+                    if rows:
+                        existing = rows[0]
+                        for field in insert_only_fields:
+                            fields.pop(field, None)
+                        if any(existing.get(k) != v for k, v in fields.items()):
+                            updated += 1
+                            existing.update(fields, **on_change)
+                            self._write_doc(conn, table, existing['id'], existing, insert=False)
+                    else:
+                        self._write_doc(conn, table, str(ObjectId()), dict(fields, **on_change), insert=True)
+                        inserted += 1
+                except sqlite3.Error as e:
+                    errors[index] = str(e)
+        return inserted, updated, errors
+
+    # Users
+    def load_users(self):
+        return self._select('users')
+
+    def count_users(self):
+        return self._count('users')
+
+    def count_admins(self):
+        return self._connection().execute("SELECT COUNT(*) FROM users WHERE role = 'admin'").fetchone()[0]
+
+    def exists_username_ci(self, username, exclude_user_id=None):
+        row = self._connection().execute(
+            "SELECT 1 FROM users WHERE username = ? COLLATE NOCASE AND id IS NOT ? LIMIT 1",
+            (username, exclude_user_id)
+        ).fetchone()
+        return row is not None
+
+    def add_user(self, user_data):
+        return self._insert('users', user_data)
+
+    def find_user_by_username(self, username):
+        docs = self._select('users', "username = ? COLLATE NOCASE", (username,), "LIMIT 1")
+        return docs[0] if docs else None
+
+    def find_user_by_id(self, user_id):
+        return self._find('users', user_id)
+
+    def update_user(self, user_id, updates):
+        return self._update('users', user_id, updates)
+
+    def delete_user(self, user_id):
+        return self._delete('users', user_id)
+
+    # Inventory
+    def get_all_inventory_items(self):
+        return self._select('inventory')
+
+    def _inventory_where(self, search_term, category):
+        clauses, params = [], []
+        if search_term:
+            # LIKE is case-insensitive for ASCII; escape the wildcards the user may have typed
+            escaped = search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        if category and category != "All":
+            clauses.append("category = ?")
+            params.append(category)
+        return " AND ".join(clauses), tuple(params)
+
+    def query_inventory_items(self, search_term=None, category=None, page=1, page_size=24):
+        page, page_size = max(int(page), 1), max(int(page_size), 1)
+        where, params = self._inventory_where(search_term, category)
+        total_count = self._connection().execute(
+            f"SELECT COUNT(*) FROM inventory {('WHERE ' + where) if where else ''}", params).fetchone()[0]
+        items = self._select('inventory', where, params + (page_size, (page - 1) * page_size),
+                             "ORDER BY name, id LIMIT ? OFFSET ?")
+        return items, total_count
+
+    def count_inventory_items(self, search_term=None, category=None):
+        where, params = self._inventory_where(search_term, category)
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM inventory {('WHERE ' + where) if where else ''}", params).fetchone()[0]
+
+    def get_inventory_summary(self, low_stock_threshold):
+        conn = self._connection()
+        total_items, total_value, low_stock_count = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(quantity * price), 0), COALESCE(SUM(quantity <= ?), 0) FROM inventory",
+            (low_stock_threshold,)
+        ).fetchone()
+        category_counts = [tuple(row) for row in conn.execute(
+            "SELECT COALESCE(category, 'N/A') AS category, COUNT(*) AS count FROM inventory "
+            "GROUP BY COALESCE(category, 'N/A') ORDER BY count DESC, category"
+        )]
+        return {
+            'total_items': total_items,
+            'total_value': total_value,
+            'low_stock_count': low_stock_count,
+            'category_counts': category_counts
+        }
+
+    def get_low_stock_items(self, low_stock_threshold):
+        return self._select('inventory', "quantity <= ?", (low_stock_threshold,), "ORDER BY quantity, name")
+
+    def add_inventory_item(self, item_data):
+        item_data['updated_at'] = utc_now()
+        return self._insert('inventory', item_data)
+
+    def bulk_upsert_inventory_items(self, items):
+        now = utc_now()
+        docs = [dict(item, pdf_filename=item.get('pdf_filename')) for item in items]
+        # Only new or actually changed items need a new PDF and count as updated by the daily report
+        return self._upsert_by('inventory', docs, ('name', 'category'), ('pdf_filename',),
+                               on_change={'pdf_status': 'pending', 'updated_at': now})
+
+    def find_inventory_items_pending_pdf(self, limit=50):
+        return self._select('inventory', "pdf_status = 'pending'", (), f"LIMIT {int(limit)}")
+
+    def update_inventory_item(self, item_id, updates):
+        return self._update('inventory', item_id, dict(updates, updated_at=utc_now()))
+
+    def set_inventory_pdf_state(self, item_id, pdf_status, pdf_filename=None):
+        updates = {'pdf_status': pdf_status}
+        if pdf_filename is not None:
+            updates['pdf_filename'] = pdf_filename
+        return self._update('inventory', item_id, updates) # No updated_at: the printed content is unchanged
+
+    def adjust_inventory_quantity(self, item_id, delta):
+        doc_id = _valid_id(item_id)
+        if not doc_id:
+            return None
+        with self._write_lock, self._connection() as conn:
+            # Single conditional UPDATE, the SQL counterpart of $inc with a non-negative guard
+            cursor = conn.execute(
+                "UPDATE inventory SET quantity = quantity + ?, updated_at = ? WHERE id = ? AND quantity + ? >= 0",
+                (delta, _datetime_to_sqlite(utc_now()), doc_id, delta)
+            )
+            if cursor.rowcount == 0:
+                return None
+        return self._find('inventory', doc_id)
+
+    def delete_inventory_item(self, item_id):
+        return self._delete('inventory', item_id)
+
+    def find_inventory_item_by_id(self, item_id):
+        return self._find('inventory', item_id)
+
+    # Suppliers
+    def get_all_suppliers(self):
+        return self._select('suppliers')
+
+    def count_suppliers(self):
+        return self._count('suppliers')
+
+    def add_supplier(self, supplier_data):
+        return self._insert('suppliers', supplier_data)
+
+    def bulk_upsert_suppliers(self, suppliers):
+        return self._upsert_by('suppliers', suppliers, ('email',), ('created_at',))
+
+    def update_supplier(self, supplier_id, updates):
+        return self._update('suppliers', supplier_id, updates)
+
+    def delete_supplier(self, supplier_id):
+        return self._delete('suppliers', supplier_id)
+
+    def find_supplier_by_id(self, supplier_id):
+        return self._find('suppliers', supplier_id)
+
+    def find_suppliers_by_category(self, category_name):
+        return self._select('suppliers', "id IN (SELECT supplier_id FROM supplier_categories WHERE category = ?)", (category_name,))
+
+    def get_supplier_contacts_by_category(self, categories):
+        wanted = [category for category in set(categories) if category]
+        if not wanted:
+            return {}
+        placeholders = ", ".join("?" for _ in wanted)
+        suppliers = self._select('suppliers', f"id IN (SELECT supplier_id FROM supplier_categories WHERE category IN ({placeholders}))", tuple(wanted))
+        return _contacts_from_suppliers(suppliers, wanted)
+
+    # Daily report state
+    def get_report_snapshots(self, item_ids):
+        item_ids = list(item_ids)
+        snapshots = {}
+        conn = self._connection()
+        for start in range(0, len(item_ids), 500): # Stay below SQLite's bound parameter limit
+            chunk = item_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in conn.execute(f"SELECT id, doc FROM report_snapshots WHERE id IN ({placeholders})", chunk):
+                snapshots[row['id']] = json.loads(row['doc'])
+        return snapshots
+
+    def save_report_snapshots(self, snapshots):
+        with self._write_lock, self._connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO report_snapshots (id, doc) VALUES (?, ?)",
+                             [(item_id, json.dumps(snapshot, default=str)) for item_id, snapshot in snapshots.items()])
+
+    def delete_report_snapshots(self, item_ids):
+        with self._write_lock, self._connection() as conn:
+            conn.executemany("DELETE FROM report_snapshots WHERE id = ?", [(item_id,) for item_id in item_ids])
+
+    def iter_report_snapshots(self, batch_size=DEFAULT_ITER_BATCH_SIZE):
+        cursor = self._connection().execute("SELECT id, doc FROM report_snapshots ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(max(int(batch_size), 1))
+            if not rows:
+                return
+            for row in rows:
+                yield dict(json.loads(row['doc']), id=row['id'])
+
+    def get_daily_report_summary(self, report_date):
+        row = self._connection().execute("SELECT doc FROM daily_reports WHERE report_date = ?", (report_date,)).fetchone()
+        return json.loads(row['doc']) if row else None
+
+    def get_latest_daily_report_summary(self, before_date):
+        row = self._connection().execute(
+            "SELECT doc FROM daily_reports WHERE report_date < ? ORDER BY report_date DESC LIMIT 1", (before_date,)
+        ).fetchone()
+        return json.loads(row['doc']) if row else None
+
+    def save_daily_report_summary(self, summary):
+        with self._write_lock, self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO daily_reports (report_date, doc) VALUES (?, ?)",
+                         (summary['report_date'], json.dumps(summary, default=_datetime_to_sqlite)))
+
+    # Streaming iterators
+    def _iter_table(self, table, where, params, batch_size, projection, sort, start_after_id):
+        fields, sort, start_after_id = normalize_iter_options(projection, sort, start_after_id)
+        batch_size = max(int(batch_size), 1)
+        sortable = set(_SQLITE_COLUMNS[table]) | {'_id', 'id'}
+        if sort and not all(field in sortable for field, _ in sort):
+            # Sorting on a field inside the JSON document: fall back to sorting in Python
+            yield from _iter_documents(self._select(table, where, params), fields, sort, None)
+            return
+        conn = self._connection()
+        if sort:
+            order = ", ".join(f"{'id' if field in ('_id', 'id') else field} {'DESC' if direction < 0 else 'ASC'}"
+                              for field, direction in sort)
+            cursor = conn.execute(f"SELECT * FROM {table} {('WHERE ' + where) if where else ''} ORDER BY {order}, id", params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield _project(self._row_to_doc(table, row), fields)
+        # Keyset pagination on id: every batch is a short indexed query that resumes after the last id
+        last_id = start_after_id
+        while True:
+            clauses = [where] if where else []
+            batch_params = params
+            if last_id:
+                clauses.append("id > ?")
+                batch_params = params + (last_id,)
+            batch = self._select(table, " AND ".join(clauses), batch_params + (batch_size,), "ORDER BY id LIMIT ?")
+            for doc in batch:
+                yield _project(doc, fields)
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1]['id']
+
+    def iter_users(self, batch_size=DEFAULT_ITER_BATCH_SIZE, projection=None, sort=None, start_after_id=None):
+        return self._iter_table('users', '', (), batch_size, projection, sort, start_after_id)
+
+    def iter_inventory_items(self, batch_size=DEFAULT_ITER_BATCH_SIZE, projection=None, sort=None, start_after_id=None,
+                             category=None, max_quantity=None, updated_since=None):
+        where, params = self._inventory_where(None, category)
+        if max_quantity is not None:
+            where = " AND ".join(filter(None, [where, "quantity <= ?"]))
+            params = params + (max_quantity,)
+        if updated_since is not None:
+            where = " AND ".join(filter(None, [where, "updated_at > ?"]))
+            params = params + (_datetime_to_sqlite(updated_since),)
+        return self._iter_table('inventory', where, params, batch_size, projection, sort, start_after_id)
+
+    def iter_suppliers(self, batch_size=DEFAULT_ITER_BATCH_SIZE, projection=None, sort=None, start_after_id=None):
+        return self._iter_table('suppliers', '', (), batch_size, projection, sort, start_after_id)
+
+
+# --- Backend Selection ---
+STORAGE_BACKENDS = ('mongodb', 'sqlite', 'memory')
+
+def get_configured_backend_name():
+    """Returns the backend selected by STORAGE_BACKEND (default 'mongodb')."""
+    name = os.getenv("STORAGE_BACKEND", "mongodb").strip().lower()
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND={name!r} is not supported. Use one of: {', '.join(STORAGE_BACKENDS)}.")
+    return name
+
+def get_sqlite_path():
+    """Returns the SQLite database file (SQLITE_PATH, default data/inventory.sqlite3 next to the app)."""
+    return os.getenv("SQLITE_PATH") or os.path.join(BASE_DIR, 'data', 'inventory.sqlite3')
+
+def create_backend(name):
+    """Creates a non-MongoDB backend by name ('sqlite' or 'memory')."""
+    if name == 'sqlite':
+        return SQLiteBackend(get_sqlite_path())
+    if name == 'memory':
+        return MemoryBackend()
+    raise ValueError(f"No local storage backend named {name!r}.")
@@ -1,7 +1,10 @@
+import hashlib
 import os
+import re
+import threading
+import time
 import streamlit as st # Only used for st.warning now
 from dotenv import load_dotenv # Import load_dotenv
-from PIL import Image # For placeholder image generation
 
 # Load environment variables from .env file at the start
 load_dotenv()
@@ -50,6 +53,10 @@ def get_placeholder_image_path():
     """Returns the path to the placeholder image."""
     return os.path.join(get_image_dir(), 'placeholder.png')
 
+def get_thumbnail_dir():
+    """Returns the path to the directory where generated image thumbnails are cached."""
+    return os.path.join(BASE_DIR, 'static', 'thumbnails')
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'} # Allowed image extensions for uploads
 
 def allowed_file(filename):
@@ -57,6 +64,12 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+EMAIL_PATTERN = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+def is_valid_email(email):
+    """Basic regex for email validation."""
+    return bool(email) and EMAIL_PATTERN.match(email) is not None
+
 def get_low_stock_threshold():
     """Retrieves the low stock threshold from environment variables, defaulting to 5."""
     try:
@@ -67,6 +80,15 @@ def get_low_stock_threshold():
         st.warning("LOW_STOCK_THRESHOLD in .env is not a valid number. Using default: 5.")
         return 5
 
+def get_inventory_page_size():
+    """Retrieves how many inventory items are shown per page, defaulting to 24."""
+    try:
+        page_size = int(os.getenv("INVENTORY_PAGE_SIZE", "24"))
+        return page_size if page_size > 0 else 24
+    except ValueError:
+        st.warning("INVENTORY_PAGE_SIZE in .env is not a valid number. Using default: 24.")
+        return 24
+
 def get_currency_symbol():
     """Retrieves the currency symbol from environment variables, defaulting to '₹'."""
     # Use os.getenv to read from environment variables (loaded from .env)
@@ -89,11 +111,13 @@ def ensure_dirs():
     
     os.makedirs(pdf_dir, exist_ok=True)
     os.makedirs(images_dir, exist_ok=True)
+    os.makedirs(get_thumbnail_dir(), exist_ok=True)
 
     # Create a placeholder image if it doesn't exist
     placeholder_path = get_placeholder_image_path()
     if not os.path.exists(placeholder_path):
         try:
+            from PIL import Image # Imported only when the placeholder has to be generated (Pillow is slow to import)
             # A very minimal 1x1 transparent PNG. For a better visual, you should replace this with a proper image.
             # This is just to prevent errors if the file is missing.
             img = Image.new('RGBA', (1, 1), (255, 255, 255, 0)) # Transparent white 1x1 pixel
@@ -104,3 +128,145 @@ def ensure_dirs():
             # Fallback to creating an empty file if Pillow is not available
             with open(placeholder_path, 'w') as f:
                 f.write("") # Create an empty file, which might cause issues but prevents FileNotFoundError
+
+
+# --- Image Thumbnails ---
+# Pages show item images through thumbnails instead of the uploaded originals, so a page of cards
+# ships a few KB per image instead of full-resolution files. Requested widths are rounded up to a
+# small set of size buckets, so every image has at most len(THUMBNAIL_SIZES) thumbnails.
+# Thumbnails are written on first use and named after a hash of the source path, modification time
+# and size: replacing an image changes the name, and the old thumbnail is simply never used again.
+# The cache directory is kept under THUMBNAIL_CACHE_MB by removing the least recently used files.
+# Recency is the file's modification time (shared by all processes); a cache hit refreshes it at most
+# once per THUMBNAIL_TOUCH_INTERVAL_SECONDS, so reruns showing the same cards don't write to the disk.
+THUMBNAIL_SIZES = (128, 256, 512, 1024) # Longest side in pixels
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_TOUCH_INTERVAL_SECONDS = 300
+MAX_THUMBNAIL_FAILURES = 1000
+
+_thumbnail_lock = threading.Lock()
+_thumbnail_cache_bytes = None # Total size of the cache directory, counted on the first write
+_thumbnail_format = None # (Pillow format, extension), or (None, None) when Pillow is not installed
+_thumbnail_touched = {} # Thumbnail path -> time.monotonic() of its last modification time refresh
+# Sources that could not be decoded, so they are not retried on every rerun (oldest dropped first)
+_thumbnail_failures = {}
+
+def get_thumbnail_cache_limit():
+    """Retrieves the thumbnail cache size limit in bytes (THUMBNAIL_CACHE_MB, default 64)."""
+    try:
+        return max(int(os.getenv("THUMBNAIL_CACHE_MB", "64")), 1) * 1024 * 1024
+    except ValueError:
+        print("Warning: THUMBNAIL_CACHE_MB is not a valid number. Using default: 64.")
+        return 64 * 1024 * 1024
+
+def _get_thumbnail_format():
+    """WebP when this Pillow build can encode it (smaller, keeps transparency), otherwise JPEG."""
+    global _thumbnail_format
+    if _thumbnail_format is None:
+        try:
+            from PIL import features
+        except ImportError:
+            print("Pillow not installed. Serving original images instead of thumbnails.")
+            _thumbnail_format = (None, None)
+        else:
+            _thumbnail_format = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+    return _thumbnail_format
+
+def thumbnail_bucket(width):
+    """Smallest thumbnail size that covers the requested width (the largest size for bigger requests)."""
+    for size in THUMBNAIL_SIZES:
+        if width <= size:
+            return size
+    return THUMBNAIL_SIZES[-1]
+
+def get_thumbnail_path(image_path, width):
+    """
+    Returns the path of a thumbnail of image_path at least `width` pixels wide (capped by the size
+    buckets and the original size), generating it on first use.
+    Returns None if the image cannot be read, and image_path itself if Pillow is not installed.
+    """
+    try:
+        source = os.stat(image_path)
+    except OSError:
+        return None
+    size = thumbnail_bucket(width)
+    image_format, extension = _get_thumbnail_format()
+    if image_format is None:
+        return image_path # Pillow not installed
+    source_key = f"{os.path.abspath(image_path)}|{source.st_mtime_ns}|{source.st_size}"
+    if source_key in _thumbnail_failures:
+        return None
+    thumbnail_name = f"{hashlib.sha256(source_key.encode('utf-8')).hexdigest()[:24]}-{size}.{extension}"
+    thumbnail_path = os.path.join(get_thumbnail_dir(), thumbnail_name)
+
+    if os.path.exists(thumbnail_path):
+        _touch_thumbnail(thumbnail_path)
+        return thumbnail_path
+
+    from PIL import Image, ImageOps # Imported only when a thumbnail has to be generated (Pillow is slow to import)
+    temp_path = f"{thumbnail_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with Image.open(image_path) as img:
+            img = ImageOps.exif_transpose(img) # Phone photos store their rotation in EXIF
+            img.thumbnail((size, size))
+            if image_format == 'JPEG' or img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGBA' if image_format == 'WEBP' and 'A' in img.getbands() else 'RGB')
+            os.makedirs(get_thumbnail_dir(), exist_ok=True)
+            img.save(temp_path, image_format, quality=THUMBNAIL_QUALITY)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        print(f"Warning: Could not create a thumbnail for {image_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        with _thumbnail_lock:
+            _thumbnail_failures[source_key] = True
+            while len(_thumbnail_failures) > MAX_THUMBNAIL_FAILURES:
+                del _thumbnail_failures[next(iter(_thumbnail_failures))]
+        return None
+    os.replace(temp_path, thumbnail_path) # Concurrent sessions never see a half-written file
+    _account_thumbnail(thumbnail_path)
+    return thumbnail_path
+
+def _touch_thumbnail(thumbnail_path):
+    """Marks a thumbnail as recently used for the eviction order, at most once per THUMBNAIL_TOUCH_INTERVAL_SECONDS."""
+    now = time.monotonic()
+    last_touched = _thumbnail_touched.get(thumbnail_path)
+    if last_touched is not None and now - last_touched < THUMBNAIL_TOUCH_INTERVAL_SECONDS:
+        return
+    _thumbnail_touched[thumbnail_path] = now
+    try:
+        os.utime(thumbnail_path)
+    except OSError:
+        pass
+
+def _account_thumbnail(thumbnail_path):
+    """Adds a new thumbnail to the cache size and evicts the least recently used ones when over the limit."""
+    global _thumbnail_cache_bytes
+    with _thumbnail_lock:
+        if _thumbnail_cache_bytes is None:
+            _thumbnail_cache_bytes = sum(entry.stat().st_size for entry in os.scandir(get_thumbnail_dir()) if entry.is_file())
+        else:
+            _thumbnail_cache_bytes += os.path.getsize(thumbnail_path)
+        limit = get_thumbnail_cache_limit()
+        if _thumbnail_cache_bytes > limit:
+            _thumbnail_cache_bytes = evict_thumbnails(int(limit * 0.9), keep=thumbnail_path) # Leave headroom so evictions don't run on every write
+
+def evict_thumbnails(max_bytes, keep=None):
+    """Removes the least recently used thumbnails (except keep) until the cache holds at most max_bytes. Returns the bytes kept."""
+    entries = []
+    for entry in os.scandir(get_thumbnail_dir()):
+        if entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue # The thumbnail that is about to be shown
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass # Removed by another process, or still being written on Windows
+        _thumbnail_touched.pop(path, None)
+    return total